@@ -1,5 +1,4 @@
 """Dagster E-commerce Pipeline"""
-from dagster import Definitions
 from .definitions import defs
 
 __version__ = "1.0.0"
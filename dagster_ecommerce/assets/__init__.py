@@ -1,11 +1,15 @@
 """All assets"""
-from dagster import load_assets_from_modules
-from . import bronze, silver, gold
+from .bronze import bronze_assets
+from .silver import clean_orders, clean_customers, check_clean_orders_quality
+from .gold import daily_sales_summary, customer_lifetime_value, sales_rollups
+from .maintenance import compacted_order_files
 
-bronze_assets = load_assets_from_modules([bronze])
-silver_assets = load_assets_from_modules([silver])
-gold_assets = load_assets_from_modules([gold])
+# Listed explicitly rather than scanned with load_assets_from_modules
+silver_assets = [clean_orders, clean_customers]
+gold_assets = [daily_sales_summary, customer_lifetime_value, sales_rollups]
+maintenance_assets = [compacted_order_files]
 
-all_assets = [*bronze_assets, *silver_assets, *gold_assets]
+all_assets = [*bronze_assets, *silver_assets, *gold_assets, *maintenance_assets]
+all_asset_checks = [check_clean_orders_quality]
 
-__all__ = ["all_assets"]
\ No newline at end of file
+__all__ = ["all_assets", "all_asset_checks"]
\ No newline at end of file
@@ -1,6 +1,19 @@
 """Bronze layer assets"""
+import os
 from .orders import raw_orders
 from .customers import raw_customers
 from .products import raw_products
+from .fused import raw_bronze
 
-__all__ = ["raw_orders", "raw_customers", "raw_products"]
\ No newline at end of file
+# BRONZE_FUSED=true: the three raw assets run as one multi-asset step
+BRONZE_FUSED = os.getenv("BRONZE_FUSED", "false").lower() == "true"
+
+bronze_assets = [raw_bronze] if BRONZE_FUSED else [raw_orders, raw_customers, raw_products]
+
+# Op that takes raw_orders' run config
+RAW_ORDERS_OP = raw_bronze.op.name if BRONZE_FUSED else "raw_orders"
+
+__all__ = [
+    "raw_orders", "raw_customers", "raw_products", "raw_bronze",
+    "BRONZE_FUSED", "bronze_assets", "RAW_ORDERS_OP"
+]
@@ -1,43 +1,86 @@
 """Bronze layer - Raw customers data"""
+from typing import TYPE_CHECKING, Dict, Tuple
 from dagster import asset, AssetExecutionContext, MetadataValue
-import pandas as pd
 from ...resources.api_client import PublicAPIClient
+from ...resources.settings import PipelineSettings
+from ...types import DataFrame
+from ...utils.cdc import SnapshotSyncConfig
+from ...pools import API_POOL
 
+if TYPE_CHECKING:
+    import pandas as pd
 
-@asset(
-    group_name="bronze",
-    compute_kind="python"
-)
-def raw_customers(
-    context: AssetExecutionContext,
-    api_client: PublicAPIClient
-) -> pd.DataFrame:
-    """
-    Extract customer data from JSONPlaceholder API
-    Real users with real data structure
-    """
-    context.log.info("Fetching customers from JSONPlaceholder API...")
+
+def extract_customers(
+    log,
+    config: SnapshotSyncConfig,
+    api_client: PublicAPIClient,
+    settings: PipelineSettings
+) -> Tuple["pd.DataFrame", Dict]:
+    """Fetch, flatten and save customers; returns the frame and its metadata"""
+    from ...schemas import USERS_FLAT_NAMES
+    from ...utils.cdc import SnapshotStore
+    from ...utils.contracts import conform, to_frame, write_contract
+    from ...utils.columnar import flatten_table, split_full_name, undeclared_keys
+    from ...utils.http import endpoint_stats
+    
+    log.info("Fetching customers from JSONPlaceholder API...")
+    
+    # Get users from public API, already columnar
+    table = api_client.get_users_table()
+    undeclared = undeclared_keys(table)
+    if undeclared:
+        log.warning(f"Dropped undeclared user keys {undeclared}")
     
-    # Get users from public API
-    users_data = api_client.get_users()
-    df = pd.DataFrame(users_data)
+    # Flatten address/company in one pass, split names
+    table = split_full_name(flatten_table(table, USERS_FLAT_NAMES))
     
-    # Flatten address
-    if 'address' in df.columns:
-        df['city'] = df['address'].apply(lambda x: x.get('city', '') if isinstance(x, dict) else '')
-        df['street'] = df['address'].apply(lambda x: x.get('street', '') if isinstance(x, dict) else '')
-        df['zipcode'] = df['address'].apply(lambda x: x.get('zipcode', '') if isinstance(x, dict) else '')
+    # Typed once here: signup_date parsed, segment as a categorical;
+    # sampled customers only in a sampled run
+    df = settings.sample(to_frame(conform(table, "raw_customers")))
+    changes = {}
     
     # Save
-    output_path = "data/raw/customers/customers.parquet"
-    df.to_parquet(output_path, index=False)
+    store = SnapshotStore(
+        settings.path("raw/customers"), "customer_id", "customers.parquet", asset="raw_customers"
+    )
+    if config.incremental:
+        df, changes = store.sync(df, consolidate_every=config.consolidate_every)
+    else:
+        write_contract(df, "raw_customers", settings.path("raw/customers/customers.parquet"))
+        store.reset()
     
-    context.add_output_metadata({
+    return df, {
+        **changes,
         "num_customers": len(df),
+        "sample_rate": settings.sample_rate,
         "segments": MetadataValue.md(
             df['customer_segment'].value_counts().to_markdown()
         ),
-        "preview": MetadataValue.md(df.head(10).to_markdown())
-    })
+        "preview": MetadataValue.md(df.head(10).to_markdown()),
+        "undeclared_keys": MetadataValue.json(undeclared),
+        "api_latency": MetadataValue.json(endpoint_stats())
+    }
+
+
+@asset(
+    group_name="bronze",
+    compute_kind="python",
+    pool=API_POOL
+)
+def raw_customers(
+    context: AssetExecutionContext,
+    config: SnapshotSyncConfig,
+    api_client: PublicAPIClient,
+    settings: PipelineSettings
+) -> DataFrame:
+    """
+    Extract customer data from JSONPlaceholder API
+    Real users with real data structure
+    With config.incremental only changed rows are written, as a delta,
+    and the returned rows carry a _change column for clean_customers
+    """
+    df, metadata = extract_customers(context.log, config, api_client, settings)
+    context.add_output_metadata(metadata)
     
     return df
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""Bronze layer - All raw assets in one step"""
+from dagster import (
+    multi_asset,
+    AssetExecutionContext,
+    AssetOut,
+    AssetSpec,
+    Output
+)
+from ...partitions import order_partitions
+from ...pools import API_POOL
+from ...resources.api_client import PublicAPIClient
+from ...resources.settings import PipelineSettings
+from ...types import DataFrame
+from ...utils.cdc import SnapshotSyncConfig
+from ...utils.microbatch import MicroBatchConfig
+from .orders import extract_orders
+from .customers import extract_customers
+from .products import extract_products
+
+
+class BronzeConfig(MicroBatchConfig, SnapshotSyncConfig):
+    """Config of raw_orders and of the snapshots, in one place"""
+
+
+def _out(name: str, partitions_def=None) -> AssetOut:
+    # Not required: only the selected outputs are produced
+    return AssetOut.from_spec(
+        AssetSpec(name, group_name="bronze", kinds={"python"}, partitions_def=partitions_def),
+        dagster_type=DataFrame,
+        is_required=False
+    )
+
+
+@multi_asset(
+    name="raw_bronze",
+    outs={
+        "raw_orders": _out("raw_orders", order_partitions),
+        "raw_customers": _out("raw_customers"),
+        "raw_products": _out("raw_products")
+    },
+    can_subset=True,
+    pool=API_POOL
+)
+def raw_bronze(
+    context: AssetExecutionContext,
+    config: BronzeConfig,
+    api_client: PublicAPIClient,
+    settings: PipelineSettings
+):
+    """
+    raw_orders, raw_customers and raw_products in one step
+    - Still three assets for lineage and selection; any subset can run
+    - Selected assets are extracted and written concurrently, over one
+      HTTP session, and the catalog that orders and products both need
+      is fetched once
+    - raw_orders keeps its partitions; the snapshots stay unpartitioned
+    """
+    import contextvars
+    from concurrent.futures import ThreadPoolExecutor
+    from ...utils.http import shared_responses
+
+    selected = {key.to_user_string() for key in context.selected_asset_keys}
+    extractors = {
+        "raw_orders": lambda: extract_orders(context.log, context.partition_key, config, api_client, settings),
+        "raw_customers": lambda: extract_customers(context.log, config, api_client, settings),
+        "raw_products": lambda: extract_products(context.log, config, api_client, settings)
+    }
+    names = [name for name in extractors if name in selected]
+    context.log.info(f"Extracting {', '.join(names)} in one step")
+
+    with shared_responses(), ThreadPoolExecutor(max_workers=len(names) or 1) as executor:
+        # Each extractor runs in a copy of this context, to see the shared responses
+        futures = {
+            name: executor.submit(contextvars.copy_context().run, extractors[name])
+            for name in names
+        }
+        results = {name: future.result() for name, future in futures.items()}
+
+    for name in names:
+        df, metadata = results[name]
+        yield Output(df, output_name=name, metadata=metadata)
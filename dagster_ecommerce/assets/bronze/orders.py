@@ -2,52 +2,132 @@
 from dagster import (
     asset, 
     AssetExecutionContext,
-    DailyPartitionsDefinition,
     MetadataValue
 )
-import pandas as pd
-from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Tuple
+from ...partitions import order_partitions, order_slice, filter_orders
 from ...resources.api_client import PublicAPIClient 
+from ...resources.settings import PipelineSettings
+from ...types import DataFrame
+from ...utils.microbatch import MicroBatchConfig
+from ...pools import API_POOL
 
+if TYPE_CHECKING:
+    import pandas as pd
 
-daily_partitions = DailyPartitionsDefinition(start_date="2024-01-01")
+
+def extract_orders(
+    log,
+    partition_key: str,
+    config: MicroBatchConfig,
+    api_client: PublicAPIClient,
+    settings: PipelineSettings
+) -> Tuple["pd.DataFrame", Dict]:
+    """Fetch and save one order partition; returns the frame and its metadata"""
+    from datetime import datetime, timezone
+    from ...utils.contracts import conform, to_frame, write_contract
+    from ...utils.http import endpoint_stats
+    from ...utils.microbatch import (
+        append_part, clear_parts, read_partition, read_watermark, write_watermark
+    )
+    
+    partition = order_slice(partition_key)
+    partition_dir = settings.path("raw/orders", partition.path)
+    window_start, window_end = partition.window
+    now = datetime.now(timezone.utc).replace(tzinfo=None).isoformat(timespec="seconds")
+    # Orders up to now only: the watermark says the rest is still to come
+    until = min(now, window_end)
+    
+    if config.append:
+        watermark = read_watermark(partition_dir)
+        since = watermark.get("until", window_start)
+        log.info(f"Fetching orders for {partition.path} in [{since}, {until})")
+        
+        # Parsed to the raw_orders contract once, here
+        fetched = filter_orders(
+            to_frame(conform(
+                api_client.get_new_orders_table(
+                    since=since,
+                    until=until,
+                    first_order_id=watermark.get("next_order_id", partition.first_order_id),
+                    category=partition.category
+                ),
+                "raw_orders"
+            )),
+            partition,
+            until
+        )
+        new_orders = settings.sample(fetched)
+        if len(new_orders):
+            append_part(new_orders, partition_dir, asset="raw_orders")
+        df = read_partition(partition_dir, asset="raw_orders")
+    else:
+        log.info(f"Fetching orders for {partition.path}")
+        
+        if partition.hour is None and partition.category is None:
+            # Whole day: the client's daily generation, as before slicing
+            orders_table = api_client.get_orders_table(
+                start_date=partition.date,
+                end_date=partition.date
+            )
+        else:
+            # One call for the slice's own window (and category), numbered
+            # from the slice's block so the slices of a day never collide
+            orders_table = api_client.get_new_orders_table(
+                since=window_start,
+                until=until,
+                first_order_id=partition.first_order_id,
+                category=partition.category
+            )
+        
+        fetched = filter_orders(to_frame(conform(orders_table, "raw_orders")), partition, until)
+        df = new_orders = settings.sample(fetched)
+        
+        # Save to parquet, replacing any micro-batch parts
+        write_contract(df, "raw_orders", f"{partition_dir}/orders.parquet")
+        clear_parts(partition_dir)
+    
+    # Next micro-batch continues after this one, sampled-out orders included
+    last_ids = [int(frame['order_id'].max()) for frame in (df, fetched) if len(frame)]
+    write_watermark(
+        partition_dir,
+        until=until,
+        next_order_id=max(last_ids) + 1 if last_ids else partition.first_order_id
+    )
+    
+    return df, {
+        "num_records": len(df),
+        "columns": MetadataValue.md(", ".join(df.columns)),
+        "preview": MetadataValue.md(df.head(10).to_markdown()),
+        "date_range": f"{df['order_date'].min()} to {df['order_date'].max()}",
+        "total_revenue": f"${df['total_amount'].sum():,.2f}",
+        "new_records": len(new_orders),
+        "sample_rate": settings.sample_rate,
+        "watermark": until,
+        "api_latency": MetadataValue.json(endpoint_stats())
+    }
 
 
 @asset(
-    partitions_def=daily_partitions,
+    partitions_def=order_partitions,
     group_name="bronze",
-    compute_kind="python"
+    compute_kind="python",
+    pool=API_POOL
 )
 def raw_orders(
     context: AssetExecutionContext,
-    api_client: PublicAPIClient
-) -> pd.DataFrame:
+    config: MicroBatchConfig,
+    api_client: PublicAPIClient,
+    settings: PipelineSettings
+) -> DataFrame:
     """
     Extract raw orders from external API
-    Partitioned by order date
+    Partitioned by order date (optionally by hour or date x category)
+    With config.append only orders since the partition's watermark are
+    fetched and added as a part file; the whole partition is returned
+    With settings.sample_rate < 1 only orders of sampled customers are kept
     """
-    partition_date = context.partition_key
-    context.log.info(f"Fetching orders for {partition_date}")
-    
-    # Fetch from API
-    orders_data = api_client.get_orders(
-        start_date=partition_date,
-        end_date=partition_date
-    )
-    
-    df = pd.DataFrame(orders_data)
-    
-    # Save to parquet
-    output_path = f"data/raw/orders/date={partition_date}/orders.parquet"
-    df.to_parquet(output_path, index=False)
-    
-    # Add metadata
-    context.add_output_metadata({
-        "num_records": len(df),
-        "columns": MetadataValue.md(", ".join(df.columns)),
-        "preview": MetadataValue.md(df.head(10).to_markdown()),
-        "date_range": f"{df['order_date'].min()} to {df['order_date'].max()}",
-        "total_revenue": f"${df['total_amount'].sum():,.2f}"
-    })
+    df, metadata = extract_orders(context.log, context.partition_key, config, api_client, settings)
+    context.add_output_metadata(metadata)
     
-    return df
\ No newline at end of file
+    return df
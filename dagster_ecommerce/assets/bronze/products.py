@@ -1,35 +1,76 @@
 ﻿"""Bronze layer - Raw products data"""
+from typing import TYPE_CHECKING, Dict, Tuple
 from dagster import asset, AssetExecutionContext, MetadataValue
-import pandas as pd
-from ...resources.api_client import MockAPIClient
 from ...resources.api_client import PublicAPIClient 
+from ...resources.settings import PipelineSettings
+from ...types import DataFrame
+from ...utils.cdc import SnapshotSyncConfig
+from ...pools import API_POOL
 
-@asset(
-    group_name="bronze",
-    compute_kind="python"
-)
-def raw_products(
-    context: AssetExecutionContext,
-    api_client: PublicAPIClient
-    
-) -> pd.DataFrame:
-    """Extract product catalog from FakeStore API"""
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def extract_products(
+    log,
+    config: SnapshotSyncConfig,
+    api_client: PublicAPIClient,
+    settings: PipelineSettings
+) -> Tuple["pd.DataFrame", Dict]:
+    """Fetch, flatten and save the catalog; returns the frame and its metadata"""
+    from ...schemas import PRODUCTS_FLAT_NAMES
+    from ...utils.cdc import SnapshotStore
+    from ...utils.contracts import conform, to_frame, write_contract
+    from ...utils.columnar import flatten_table, undeclared_keys
+    from ...utils.http import endpoint_stats
     
-    context.log.info("Fetching products from FakeStore API...")
-    products_data = api_client.get_products()
-    df = pd.DataFrame(products_data)
+    log.info("Fetching products from FakeStore API...")
+    payload = api_client.get_products_table()
+    undeclared = undeclared_keys(payload)
+    if undeclared:
+        log.warning(f"Dropped undeclared product keys {undeclared}")
+    table = conform(flatten_table(payload, PRODUCTS_FLAT_NAMES), "raw_products")
+    df = to_frame(table)
+    changes = {}
     
     # Save
-    output_path = "data/raw/products/products.parquet"
-    df.to_parquet(output_path, index=False)
+    store = SnapshotStore(settings.path("raw/products"), "id", "products.parquet", asset="raw_products")
+    if config.incremental:
+        df, changes = store.sync(df, consolidate_every=config.consolidate_every)
+    else:
+        write_contract(table, "raw_products", settings.path("raw/products/products.parquet"))
+        store.reset()
     
-    context.add_output_metadata({
+    return df, {
+        **changes,
         "num_products": len(df),
         "categories": MetadataValue.md(
             df['category'].value_counts().to_markdown()
         ),
         "avg_price": f"${df['price'].mean():.2f}",
-        "preview": MetadataValue.md(df.head(10).to_markdown())
-    })
+        "preview": MetadataValue.md(df.head(10).to_markdown()),
+        "undeclared_keys": MetadataValue.json(undeclared),
+        "api_latency": MetadataValue.json(endpoint_stats())
+    }
+
+
+@asset(
+    group_name="bronze",
+    compute_kind="python",
+    pool=API_POOL
+)
+def raw_products(
+    context: AssetExecutionContext,
+    config: SnapshotSyncConfig,
+    api_client: PublicAPIClient,
+    settings: PipelineSettings
+    
+) -> DataFrame:
+    """
+    Extract product catalog from FakeStore API
+    Not sampled: every sampled order still finds its product
+    """
+    df, metadata = extract_products(context.log, config, api_client, settings)
+    context.add_output_metadata(metadata)
     
     return df
\ No newline at end of file
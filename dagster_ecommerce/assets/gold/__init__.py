@@ -1,5 +1,6 @@
 """Gold layer assets"""
 from .daily_sales import daily_sales_summary
 from .customer_metrics import customer_lifetime_value
+from .rollups import sales_rollups
 
-__all__ = ["daily_sales_summary", "customer_lifetime_value"]
\ No newline at end of file
+__all__ = ["daily_sales_summary", "customer_lifetime_value", "sales_rollups"]
\ No newline at end of file
@@ -1,22 +1,78 @@
 """Gold layer - Customer analytics"""
+from typing import TYPE_CHECKING
 from dagster import asset, AssetExecutionContext, MetadataValue
-import pandas as pd
+from ...resources.settings import PipelineSettings
+from ...types import DataFrame
+from ...pools import WRITER_POOL
+from ..silver.clean_orders import clean_orders
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+RFM_QUANTILES = [0.2, 0.4, 0.6, 0.8]
+# RFM dimension -> per-customer column
+RFM_COLUMNS = {
+    "recency": "days_since_last_order",
+    "frequency": "total_orders",
+    "monetary": "lifetime_value"
+}
+
+# rfm_score thresholds -> segment labels (lowest first)
+SEGMENT_THRESHOLDS = [7, 10, 13]
+SEGMENT_LABELS = ["At Risk", "Potential", "Loyal", "Champions"]
+
+
+def rfm_boundaries(df: "pd.DataFrame") -> dict:
+    """
+    Quintile boundaries per RFM dimension, as pd.qcut would cut them
+    np.quantile selects (O(n)) rather than sorting the customers
+    """
+    import numpy as np
+    
+    return {
+        name: np.quantile(df[column].to_numpy(dtype=float), RFM_QUANTILES)
+        if len(df) else np.full(len(RFM_QUANTILES), np.nan)
+        for name, column in RFM_COLUMNS.items()
+    }
 
 
 @asset(
+    deps=[clean_orders],
     group_name="gold",
-    compute_kind="python"
+    compute_kind="python",
+    pool=WRITER_POOL
 )
 def customer_lifetime_value(
     context: AssetExecutionContext,
-    clean_orders: pd.DataFrame,
-    clean_customers: pd.DataFrame
-) -> pd.DataFrame:
+    settings: PipelineSettings,
+    clean_customers: DataFrame
+) -> DataFrame:
     """
     Calculate customer lifetime value and metrics
+    RFM scores are vectorized lookups against exact quintile boundaries
+    Orders are read from the clean_orders files, through the compaction
+    manifest, not loaded partition by partition
+    A sampled run adds full-data estimates, with 95% intervals
     """
+    import numpy as np
+    import pandas as pd
+    from ...utils.sketches import score_by_boundaries
+    from ...utils.compaction import read_dataset
+    from ...utils.contracts import write_contract
+    from ...utils.customer_index import write_customer_index
+    
+    # One file per compacted month, per-day files for the rest
+    orders = read_dataset(
+        "clean_orders",
+        "clean_orders",
+        columns=['order_id', 'customer_id', 'total_amount', 'order_date'],
+        root=settings.path("compacted"),
+        data_root=settings.root
+    )
+    
     # Aggregate by customer
-    customer_metrics = clean_orders.groupby('customer_id').agg({
+    customer_metrics = orders.groupby('customer_id').agg({
         'order_id': 'count',
         'total_amount': ['sum', 'mean'],
         'order_date': ['min', 'max']
@@ -35,32 +91,23 @@ def customer_lifetime_value(
         how='left'
     )
     
-    # Calculate recency
-    df['last_order_date'] = pd.to_datetime(df['last_order_date'])
+    # Calculate recency (order dates are timestamps since bronze)
     df['days_since_last_order'] = (
         pd.Timestamp.now() - df['last_order_date']
     ).dt.days
     
-    # RFM Score (simple version)
-    df['recency_score'] = pd.qcut(
-        df['days_since_last_order'], 
-        q=5, 
-        labels=[5,4,3,2,1]
-    ).astype(int)
-    
-    df['frequency_score'] = pd.qcut(
-        df['total_orders'], 
-        q=5, 
-        labels=[1,2,3,4,5],
-        duplicates='drop'
-    ).astype(int)
+    # RFM Score - quintile boundaries, vectorized lookup
+    boundaries = rfm_boundaries(df)
     
-    df['monetary_score'] = pd.qcut(
-        df['lifetime_value'], 
-        q=5, 
-        labels=[1,2,3,4,5],
-        duplicates='drop'
-    ).astype(int)
+    df['recency_score'] = score_by_boundaries(
+        df['days_since_last_order'], boundaries['recency'], descending=True
+    )
+    df['frequency_score'] = score_by_boundaries(
+        df['total_orders'], boundaries['frequency']
+    )
+    df['monetary_score'] = score_by_boundaries(
+        df['lifetime_value'], boundaries['monetary']
+    )
     
     df['rfm_score'] = (
         df['recency_score'] + 
@@ -69,35 +116,44 @@ def customer_lifetime_value(
     )
     
     # Segment customers
-    def segment_customer(score):
-        if score >= 13:
-            return "Champions"
-        elif score >= 10:
-            return "Loyal"
-        elif score >= 7:
-            return "Potential"
-        else:
-            return "At Risk"
-    
-    df['rfm_segment'] = df['rfm_score'].apply(segment_customer)
+    df['rfm_segment'] = np.array(SEGMENT_LABELS)[
+        np.searchsorted(SEGMENT_THRESHOLDS, df['rfm_score'], side='right')
+    ]
     
     # Save
-    output_path = "data/processed/customer_metrics/clv.parquet"
-    df.to_parquet(output_path, index=False)
+    write_contract(df, "customer_lifetime_value", settings.path("processed/customer_metrics/clv.parquet"))
+    
+    # Publish the lookup index for per-customer serving
+    index_size = write_customer_index(df, settings.path("processed/customer_metrics/clv_index.npy"))
     
     # Metadata
     top_customers = df.nlargest(5, 'lifetime_value')[
         ['full_name', 'lifetime_value', 'total_orders', 'rfm_segment']
     ]
     
-    context.add_output_metadata({
+    metadata = {
         "total_customers": len(df),
         "avg_lifetime_value": f"${df['lifetime_value'].mean():.2f}",
         "avg_orders_per_customer": f"{df['total_orders'].mean():.1f}",
         "top_5_customers": MetadataValue.md(top_customers.to_markdown()),
         "segment_distribution": MetadataValue.md(
             df['rfm_segment'].value_counts().to_markdown()
-        )
-    })
+        ),
+        "lookup_index_records": index_size,
+        "rfm_boundaries": MetadataValue.json({
+            name: [float(b) for b in bounds]
+            for name, bounds in boundaries.items()
+        })
+    }
+    if settings.sampled:
+        # Per-customer values of a Bernoulli sample of customers; averages
+        # and RFM boundaries need no scaling
+        metadata["sample_rate"] = settings.sample_rate
+        metadata["estimated_full_data"] = MetadataValue.json({
+            "customers": settings.estimate(np.ones(len(df))),
+            "orders": settings.estimate(df['total_orders']),
+            "lifetime_value": settings.estimate(df['lifetime_value'])
+        })
+    context.add_output_metadata(metadata)
     
     return df
\ No newline at end of file
@@ -1,66 +1,170 @@
 """Gold layer - Daily sales metrics"""
+from typing import TYPE_CHECKING, Tuple
 from dagster import (
     asset,
     AssetExecutionContext,
-    DailyPartitionsDefinition,
     MetadataValue
 )
-import pandas as pd
+from pathlib import Path
+from ...partitions import order_partitions, order_slice
+from ...resources.settings import PipelineSettings
+from ...types import DataFrame
+from ...utils.microbatch import MicroBatchConfig
+from ...pools import CPU_POOL
 
+if TYPE_CHECKING:
+    import pandas as pd
 
-daily_partitions = DailyPartitionsDefinition(start_date="2024-01-01")
+
+def order_aggregates(df: "pd.DataFrame") -> Tuple["pd.DataFrame", "pd.DataFrame"]:
+    """
+    Additive per (date, category) sums plus distinct customers
+    Both can be combined with those of another batch of orders
+    """
+    # order_date (a timestamp since bronze) carries the time of day
+    df = df.assign(date=df['order_date'].dt.normalize())
+    sums = df.groupby(['date', 'category'], observed=True).agg(
+        num_orders=('order_id', 'count'),
+        total_revenue=('total_amount', 'sum'),
+        total_quantity=('quantity', 'sum')
+    ).reset_index()
+    customers = df[['date', 'category', 'customer_id']].drop_duplicates()
+    return sums, customers
+
+
+def combine_aggregates(
+    previous: Tuple["pd.DataFrame", "pd.DataFrame"],
+    delta: Tuple["pd.DataFrame", "pd.DataFrame"]
+) -> Tuple["pd.DataFrame", "pd.DataFrame"]:
+    """Fold a batch's aggregates into the running ones"""
+    import pandas as pd
+    
+    sums = pd.concat([previous[0], delta[0]], ignore_index=True).groupby(
+        ['date', 'category'], as_index=False
+    ).sum()
+    customers = pd.concat([previous[1], delta[1]], ignore_index=True).drop_duplicates()
+    return sums, customers
+
+
+def summarize(sums: "pd.DataFrame", customers: "pd.DataFrame") -> "pd.DataFrame":
+    """Daily summary from aggregates"""
+    unique_customers = customers.groupby(['date', 'category'], observed=True).size().rename('unique_customers')
+    summary = sums.merge(unique_customers.reset_index(), on=['date', 'category'])
+    summary['avg_order_value'] = summary['total_revenue'] / summary['num_orders']
+    
+    # Calculate metrics
+    summary['revenue_per_customer'] = (
+        summary['total_revenue'] / summary['unique_customers']
+    )
+    
+    return summary[[
+        'date', 'category', 'num_orders', 
+        'total_revenue', 'avg_order_value',
+        'total_quantity', 'unique_customers',
+        'revenue_per_customer'
+    ]]
 
 
 @asset(
-    partitions_def=daily_partitions,
+    partitions_def=order_partitions,
     group_name="gold",
-    compute_kind="python"
+    compute_kind="python",
+    pool=CPU_POOL
 )
 def daily_sales_summary(
     context: AssetExecutionContext,
-    clean_orders: pd.DataFrame,
-    raw_products: pd.DataFrame
-) -> pd.DataFrame:
+    config: MicroBatchConfig,
+    settings: PipelineSettings,
+    clean_orders: DataFrame,
+    raw_products: DataFrame
+) -> DataFrame:
     """
     Daily sales summary with product details
+    With config.append only orders newer than the last summarized one are
+    aggregated and folded into the partition's stored aggregates
+    A sampled run adds full-data estimates of the additive totals
     """
-    # Join with products
-    df = clean_orders.merge(
-        raw_products[['product_id', 'name', 'category']],
-        on='product_id',
-        how='left'
-    )
+    import pandas as pd
+    from datetime import datetime, timezone
+    import numpy as np
+    from ...utils.contracts import read_contract, write_contract
+    from ...utils.dimensions import product_dimension
+    from ...utils.microbatch import read_watermark, write_watermark
+    from ...utils.rollups import SIDECAR_NAME, daily_sidecar
     
-    # Aggregate daily metrics
-    summary = df.groupby(['order_date', 'category']).agg({
-        'order_id': 'count',
-        'total_amount': ['sum', 'mean'],
-        'quantity': 'sum',
-        'customer_id': 'nunique'
-    }).reset_index()
+    partition = order_slice(context.partition_key)
+    partition_dir = Path(settings.path("processed/daily_sales", partition.path))
+    sums_path = partition_dir / "_aggregates.parquet"
+    customers_path = partition_dir / "_customers.parquet"
+    last_order_id = read_watermark(partition_dir).get("last_order_id", 0)
     
-    summary.columns = [
-        'date', 'category', 'num_orders', 
-        'total_revenue', 'avg_order_value',
-        'total_quantity', 'unique_customers'
-    ]
+    incremental = config.append and sums_path.exists() and customers_path.exists()
+    if incremental:
+        clean_orders = clean_orders[clean_orders['order_id'] > last_order_id]
     
-    # Calculate metrics
-    summary['revenue_per_customer'] = (
-        summary['total_revenue'] / summary['unique_customers']
+    # Resolve category from the product catalog by array lookup; orders
+    # whose product is not in the catalog keep their own category
+    products = product_dimension(raw_products, root=settings.path("processed/dimensions"))
+    categories, known = products.lookup('category', clean_orders['product_id'])
+    df = clean_orders.assign(
+        category=np.where(known, categories, clean_orders['category'])
     )
+    unknown_ids = clean_orders.loc[~known, 'product_id'].unique()
     
-    # Save
-    partition_date = context.partition_key
-    output_path = f"data/processed/daily_sales/date={partition_date}/sales.parquet"
-    summary.to_parquet(output_path, index=False)
+    # Aggregate daily metrics
+    aggregates = order_aggregates(df)
+    if incremental:
+        aggregates = combine_aggregates(
+            (
+                read_contract([sums_path], "daily_sales_aggregates"),
+                read_contract([customers_path], "daily_sales_customers")
+            ),
+            aggregates
+        )
+    summary = summarize(*aggregates)
+    
+    # Save, with the aggregates the next micro-batch folds into and
+    # the sums + customer sketch the period rollups merge
+    write_contract(summary, "daily_sales_summary", partition_dir / "sales.parquet")
+    write_contract(aggregates[0], "daily_sales_aggregates", sums_path)
+    write_contract(aggregates[1], "daily_sales_customers", customers_path)
+    write_contract(daily_sidecar(*aggregates), "daily_sales_rollup", partition_dir / SIDECAR_NAME)
+    # Only an incremental run continues from the old watermark; a full one
+    # replaces the partition, whose ids may restart below it
+    summarized = [int(clean_orders['order_id'].max())] if len(clean_orders) else []
+    last_order_id = max([last_order_id, *summarized]) if incremental else max(summarized, default=0)
+    write_watermark(partition_dir, last_order_id=last_order_id)
     
-    context.add_output_metadata({
+    metadata = {
         "total_revenue": f"${summary['total_revenue'].sum():,.2f}",
         "total_orders": int(summary['num_orders'].sum()),
         "unique_customers": int(summary['unique_customers'].sum()),
-        "top_category": summary.nlargest(1, 'total_revenue')['category'].values[0],
-        "preview": MetadataValue.md(summary.to_markdown())
-    })
+        "top_category": summary.nlargest(1, 'total_revenue')['category'].values[0]
+        if len(summary) else None,
+        "preview": MetadataValue.md(summary.to_markdown()),
+        "orders_aggregated": len(clean_orders),
+        "product_dimension_version": products.version,
+        "unknown_product_ids": len(unknown_ids),
+        "unknown_product_ids_sample": MetadataValue.json(
+            [int(i) for i in unknown_ids[:20]]
+        ),
+        "incremental": incremental
+    }
+    if settings.sampled:
+        # Customers were kept with probability sample_rate, and with them
+        # all their orders: additive totals scale by 1 / sample_rate
+        metadata["sample_rate"] = settings.sample_rate
+        metadata["estimated_full_data"] = MetadataValue.json({
+            column: round(float(summary[column].sum()) / settings.sample_rate, 2)
+            for column in ["total_revenue", "num_orders", "total_quantity", "unique_customers"]
+        })
+    
+    # Micro-batch runs carry the time they were requested
+    requested_at = context.run.tags.get("ecommerce/microbatch_requested_at")
+    if requested_at:
+        metadata["microbatch_latency_seconds"] = round(
+            (datetime.now(timezone.utc) - datetime.fromisoformat(requested_at)).total_seconds(), 1
+        )
+    context.add_output_metadata(metadata)
     
     return summary
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""Gold layer - Weekly / monthly / yearly sales rollups"""
+from dagster import (
+    AssetExecutionContext,
+    AssetOut,
+    Config,
+    MetadataValue,
+    Output,
+    multi_asset
+)
+from ...pools import WRITER_POOL
+from ...resources.settings import PipelineSettings
+from .daily_sales import daily_sales_summary
+
+
+class RollupConfig(Config):
+    """full_rebuild=True recomputes every period from the daily sidecars"""
+
+    full_rebuild: bool = False
+
+
+@multi_asset(
+    outs={
+        "weekly_sales": AssetOut(),
+        "monthly_sales": AssetOut(),
+        "yearly_sales": AssetOut(),
+    },
+    deps=[daily_sales_summary],
+    group_name="gold",
+    compute_kind="python",
+    pool=WRITER_POOL
+)
+def sales_rollups(context: AssetExecutionContext, config: RollupConfig, settings: PipelineSettings):
+    """
+    Revenue by category per week, month and year (the current year is YTD)
+    Only periods containing re-materialized days are recomputed;
+    unique_customers comes from merged HyperLogLog sketches
+    """
+    from ...utils.rollups import finalize, read_rollup, update_rollups
+    
+    root = settings.path("processed/rollups")
+    result = update_rollups(
+        daily_root=settings.path("processed/daily_sales"),
+        root=root,
+        full_rebuild=config.full_rebuild
+    )
+    context.log.info(
+        f"{result['changed_days']} changed days, periods updated: {result['periods_updated']}"
+    )
+    
+    for grain, name in [("week", "weekly_sales"), ("month", "monthly_sales"), ("year", "yearly_sales")]:
+        df = finalize(read_rollup(grain, root))
+        yield Output(
+            df,
+            output_name=name,
+            metadata={
+                "path": f"{root}/{grain}.parquet",
+                "periods": int(df['period_start'].nunique()),
+                "periods_updated": result["periods_updated"][grain],
+                "changed_days": result["changed_days"],
+                "preview": MetadataValue.md(df.tail(10).to_markdown())
+            }
+        )
@@ -0,0 +1,4 @@
+"""Maintenance assets"""
+from .compaction import compacted_order_files
+
+__all__ = ["compacted_order_files"]
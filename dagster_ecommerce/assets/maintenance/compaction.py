@@ -0,0 +1,65 @@
+"""Maintenance - Monthly compaction of per-day parquet files"""
+from dagster import asset, AssetExecutionContext, Config, MetadataValue
+from ...partitions import monthly_partitions
+from ...pools import WRITER_POOL
+from ...resources.settings import PipelineSettings
+
+
+class CompactionConfig(Config):
+    """Compaction output layout"""
+
+    row_group_size: int = 128_000
+    delete_sources: bool = False
+
+
+@asset(
+    partitions_def=monthly_partitions,
+    group_name="maintenance",
+    compute_kind="pyarrow",
+    pool=WRITER_POOL
+)
+def compacted_order_files(
+    context: AssetExecutionContext,
+    config: CompactionConfig,
+    settings: PipelineSettings
+) -> None:
+    """
+    Rewrite one closed month of raw/staging orders and daily sales
+    into a single sorted, zstd-compressed file per dataset
+    Readers prune through data/compacted/<dataset>/_manifest.json;
+    customer_lifetime_value reads clean_orders through it (read_dataset)
+    """
+    from ...utils.compaction import COMPACTION_DATASETS, compact_range, month_bounds
+    
+    start_date, end_date = month_bounds(context.partition_key)
+    label = f"month={start_date[:7]}"
+    
+    results = {}
+    for name in COMPACTION_DATASETS:
+        entry = compact_range(
+            name,
+            start_date,
+            end_date,
+            label,
+            row_group_size=config.row_group_size,
+            delete_sources=config.delete_sources,
+            root=settings.path("compacted"),
+            data_root=settings.root
+        )
+        if entry is None:
+            context.log.info(f"No {name} files for {label}")
+            continue
+        context.log.info(
+            f"Compacted {entry['num_source_files']} {name} files "
+            f"into {entry['path']}"
+        )
+        results[name] = {
+            "files": entry["num_source_files"],
+            "rows": entry["num_rows"]
+        }
+    
+    context.add_output_metadata({
+        "month": label,
+        "datasets_compacted": len(results),
+        "summary": MetadataValue.json(results)
+    })
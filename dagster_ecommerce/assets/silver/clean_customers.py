@@ -1,40 +1,104 @@
 """Silver layer - Cleaned customers"""
+from typing import TYPE_CHECKING
 from dagster import asset, AssetExecutionContext, MetadataValue
-import pandas as pd
+from functools import partial
+from pathlib import Path
+from ...resources.settings import PipelineSettings
+from ...types import DataFrame
 from ...utils.validators import DataValidator
+from ...utils.parallel import ParallelConfig, run_chunked
+from ...pools import CPU_POOL
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def clean_customers_chunk(df: "pd.DataFrame", now: "pd.Timestamp") -> "pd.DataFrame":
+    """Row-local cleaning steps, safe to run on any slice of customers"""
+    validator = DataValidator()
+    
+    # Validate emails
+    df = df.copy()
+    df['email_valid'] = df['email'].apply(validator.validate_email)
+    df = df[df['email_valid'] == True].copy()
+    
+    # Standardize names
+    df['first_name'] = df['first_name'].str.title()
+    df['last_name'] = df['last_name'].str.title()
+    df['full_name'] = df['first_name'] + ' ' + df['last_name']
+    
+    # Calculate customer age (days since signup); signup_date is a
+    # timestamp since bronze
+    df['customer_age_days'] = (now - df['signup_date']).dt.days
+    
+    return df
 
 
 @asset(
     group_name="silver",
-    compute_kind="python"
+    compute_kind="python",
+    pool=CPU_POOL
 )
 def clean_customers(
     context: AssetExecutionContext,
-    raw_customers: pd.DataFrame
-) -> pd.DataFrame:
+    config: ParallelConfig,
+    settings: PipelineSettings,
+    raw_customers: DataFrame
+) -> DataFrame:
     """Clean and enrich customer data"""
+    import pandas as pd
+    from ...utils.cdc import CHANGE_COLUMN, HASH_COLUMN, row_hashes
+    from ...utils.contracts import read_contract, to_frame, write_contract
     
-    df = raw_customers.copy()
-    validator = DataValidator()
+    initial_count = len(raw_customers)
+    output_path = settings.path("staging/customers/customers.parquet")
+    consumed_path = Path(output_path).with_name("_consumed.parquet")
+    now = pd.Timestamp.now()
     
-    initial_count = len(df)
+    # Raw rows as this asset receives them, to diff the next run against
+    incoming = pd.DataFrame({
+        "customer_id": raw_customers["customer_id"].to_numpy(),
+        HASH_COLUMN: row_hashes(raw_customers)
+    })
     
-    # Validate emails
-    df['email_valid'] = df['email'].apply(validator.validate_email)
-    df = df[df['email_valid'] == True]
+    # Incremental raw_customers: re-clean only rows not cleaned before and
+    # carry the others over from the previous staging file. The diff is
+    # against what this asset consumed, not raw_customers' _change: that
+    # is relative to raw's previous sync, which this asset may have missed
+    incremental = (
+        CHANGE_COLUMN in raw_customers.columns
+        and Path(output_path).exists()
+        and consumed_path.exists()
+    )
+    if incremental:
+        seen = incoming.merge(
+            pd.read_parquet(consumed_path), on=["customer_id", HASH_COLUMN], how="left", indicator=True
+        )["_merge"].eq("both").to_numpy()
+        changed = raw_customers[~seen]
+        previous = read_contract([output_path], "clean_customers")
+        previous = previous[previous["customer_id"].isin(raw_customers.loc[seen, "customer_id"])]
+    else:
+        changed = raw_customers
+    changed = changed.drop(columns=[CHANGE_COLUMN], errors="ignore")
     
-    # Standardize names
-    df['first_name'] = df['first_name'].str.title()
-    df['last_name'] = df['last_name'].str.title()
-    df['full_name'] = df['first_name'] + ' ' + df['last_name']
+    # Every chunk measures age against the same timestamp
+    df = run_chunked(
+        changed,
+        partial(clean_customers_chunk, now=now),
+        num_workers=config.num_workers,
+        chunk_size=config.chunk_size
+    )
     
-    # Calculate customer age (days since signup)
-    df['signup_date'] = pd.to_datetime(df['signup_date'])
-    df['customer_age_days'] = (pd.Timestamp.now() - df['signup_date']).dt.days
+    if incremental:
+        df = pd.concat([previous, df], ignore_index=True).sort_values(
+            "customer_id", ignore_index=True
+        )
+        # Ages move every day, not only for changed rows
+        df['customer_age_days'] = (now - df['signup_date']).dt.days
     
-    # Save
-    output_path = "data/staging/customers/customers.parquet"
-    df.to_parquet(output_path, index=False)
+    # Save; the result is returned as written (one category set per label)
+    df = to_frame(write_contract(df, "clean_customers", output_path))
+    incoming.to_parquet(consumed_path, index=False)
     
     context.add_output_metadata({
         "initial_records": initial_count,
@@ -43,7 +107,10 @@ def clean_customers(
         "avg_customer_age_days": f"{df['customer_age_days'].mean():.0f}",
         "segments": MetadataValue.md(
             df['customer_segment'].value_counts().to_markdown()
-        )
+        ),
+        "num_workers": config.num_workers,
+        "rows_cleaned": len(changed),
+        "incremental": incremental
     })
     
     return df
\ No newline at end of file
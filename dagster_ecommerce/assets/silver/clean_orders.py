@@ -1,75 +1,124 @@
 """Silver layer - Cleaned orders"""
+from typing import TYPE_CHECKING
 from dagster import (
     asset,
     AssetExecutionContext,
-    DailyPartitionsDefinition,
     MetadataValue,
     AssetCheckResult,
     asset_check
 )
-import pandas as pd
+from ...partitions import order_partitions, order_slice
+from ...resources.settings import PipelineSettings
+from ...types import DataFrame
 from ...utils.validators import DataValidator
+from ...utils.microbatch import MicroBatchConfig
+from ...utils.parallel import ParallelConfig, run_chunked
+from ...pools import CPU_POOL
 
+if TYPE_CHECKING:
+    import pandas as pd
 
-daily_partitions = DailyPartitionsDefinition(start_date="2024-01-01")
+
+def clean_orders_chunk(df: "pd.DataFrame") -> "pd.DataFrame":
+    """Row-local cleaning steps, safe to run on any slice of orders"""
+    # Remove invalid amounts
+    df = df[df['total_amount'] > 0]
+    df = df[df['quantity'] > 0]
+    
+    # Remove nulls
+    df = df.dropna(subset=['order_id', 'customer_id', 'product_id'])
+    
+    # Add derived columns; order_date is a timestamp since bronze
+    df = df.copy()
+    df['year'] = df['order_date'].dt.year
+    df['month'] = df['order_date'].dt.month
+    df['day_of_week'] = df['order_date'].dt.day_name()
+    df['unit_price'] = df['total_amount'] / df['quantity']
+    
+    return df
+
+
+class CleanOrdersConfig(ParallelConfig, MicroBatchConfig):
+    """Chunked cleaning; append=True cleans only orders past the watermark"""
 
 
 @asset(
-    partitions_def=daily_partitions,
+    partitions_def=order_partitions,
     group_name="silver",
-    compute_kind="python"
+    compute_kind="python",
+    pool=CPU_POOL
 )
 def clean_orders(
     context: AssetExecutionContext,
-    raw_orders: pd.DataFrame
-) -> pd.DataFrame:
+    config: CleanOrdersConfig,
+    settings: PipelineSettings,
+    raw_orders: DataFrame
+) -> DataFrame:
     """
     Clean and validate orders data
     - Remove duplicates
     - Validate amounts
     - Handle nulls
+    Row-local steps run in chunks when config.num_workers > 1
+    With config.append only orders newer than the last cleaned one are
+    cleaned and added as a part file; the whole partition is returned
     """
-    df = raw_orders.copy()
-    
-    initial_count = len(df)
+    from ...utils.contracts import write_contract
+    from ...utils.microbatch import (
+        append_part, clear_parts, read_partition, read_watermark, write_watermark
+    )
     
-    # Remove duplicates
-    df = df.drop_duplicates(subset=['order_id'])
+    partition = order_slice(context.partition_key)
+    partition_dir = settings.path("staging/orders", partition.path)
+    last_order_id = read_watermark(partition_dir).get("last_order_id", 0)
+    if config.append:
+        raw_orders = raw_orders[raw_orders['order_id'] > last_order_id]
+    initial_count = len(raw_orders)
     
-    # Remove invalid amounts
-    df = df[df['total_amount'] > 0]
-    df = df[df['quantity'] > 0]
+    # Remove duplicates - global step, done before chunking so that
+    # the first occurrence wins across chunk boundaries
+    df = raw_orders.drop_duplicates(subset=['order_id'])
     
-    # Remove nulls
-    df = df.dropna(subset=['order_id', 'customer_id', 'product_id'])
-    
-    # Add derived columns
-    df['order_date'] = pd.to_datetime(df['order_date'])
-    df['year'] = df['order_date'].dt.year
-    df['month'] = df['order_date'].dt.month
-    df['day_of_week'] = df['order_date'].dt.day_name()
-    df['unit_price'] = df['total_amount'] / df['quantity']
+    df = run_chunked(
+        df,
+        clean_orders_chunk,
+        num_workers=config.num_workers,
+        chunk_size=config.chunk_size
+    )
+    batch = df
     
     # Save
-    partition_date = context.partition_key
-    output_path = f"data/staging/orders/date={partition_date}/orders.parquet"
-    df.to_parquet(output_path, index=False)
+    if config.append:
+        if len(df):
+            append_part(df, partition_dir, asset="clean_orders")
+        df = read_partition(partition_dir, asset="clean_orders")
+    else:
+        write_contract(df, "clean_orders", f"{partition_dir}/orders.parquet")
+        clear_parts(partition_dir)
+    
+    # A full run replaces the partition, and its ids may restart below the
+    # old watermark: only an append continues from it
+    cleaned = [int(raw_orders['order_id'].max())] if len(raw_orders) else []
+    last_order_id = max([last_order_id, *cleaned]) if config.append else max(cleaned, default=0)
+    write_watermark(partition_dir, last_order_id=last_order_id)
     
     # Metadata
     context.add_output_metadata({
         "initial_records": initial_count,
-        "final_records": len(df),
-        "records_dropped": initial_count - len(df),
-        "data_quality_score": f"{(len(df)/initial_count)*100:.2f}%",
+        "final_records": len(batch),
+        "records_dropped": initial_count - len(batch),
+        "data_quality_score": f"{(len(batch)/max(initial_count, 1))*100:.2f}%",
         "total_revenue": f"${df['total_amount'].sum():,.2f}",
-        "avg_order_value": f"${df['total_amount'].mean():.2f}"
+        "avg_order_value": f"${df['total_amount'].mean():.2f}",
+        "num_workers": config.num_workers,
+        "partition_records": len(df)
     })
     
     return df
 
 
-@asset_check(asset=clean_orders)
-def check_clean_orders_quality(clean_orders: pd.DataFrame) -> AssetCheckResult:
+@asset_check(asset=clean_orders, partitions_def=order_partitions)
+def check_clean_orders_quality(clean_orders: DataFrame) -> AssetCheckResult:
     """Data quality check for clean orders"""
     
     validator = DataValidator()
@@ -88,7 +137,7 @@ def check_clean_orders_quality(clean_orders: pd.DataFrame) -> AssetCheckResult:
         10000
     )
     
-    passed = not null_check['has_nulls'] and amount_check['valid']
+    passed = bool(not null_check['has_nulls'] and amount_check['valid'])
     
     return AssetCheckResult(
         passed=passed,
@@ -1,36 +1,61 @@
 """
 Main Dagster definitions
 Combines all assets, resources, schedules, and sensors
+
+Assembled lazily: the code location only imports dagster at module
+load, and the pipeline modules (and .env) are loaded when Dagster
+calls defs(). Heavy libraries (pandas, pyarrow, requests, sqlalchemy,
+duckdb) are imported inside asset/resource execution.
 """
-from dagster import Definitions
-from .assets import all_assets
-from .resources import (
-    DuckDBResource,
-    PublicAPIClient
-)
-from .schedules import daily_schedule, weekly_full_refresh
-from .sensors import csv_upload_sensor
-import os
-from dotenv import load_dotenv
+from dagster import Definitions, definitions
 
-# Load environment variables
-load_dotenv()
 
-# Define all resources
-resources = {
-    "duckdb": DuckDBResource(
-        database_path=os.getenv("DB_PATH", "data/warehouse.duckdb")
-    ),
-    "api_client": PublicAPIClient(
-        jsonplaceholder_url=os.getenv("JSONPLACEHOLDER_URL", "https://jsonplaceholder.typicode.com"),
-        fakestore_url=os.getenv("FAKESTOREAPI_URL", "https://fakestoreapi.com")
+@definitions
+def defs() -> Definitions:
+    """Build the code location"""
+    import os
+    from dotenv import load_dotenv
+    
+    # Load environment variables before any module reads them
+    load_dotenv()
+    
+    from .assets import all_assets, all_asset_checks
+    from .resources import (
+        DuckDBResource,
+        PipelineIOManager,
+        PipelineSettings,
+        PublicAPIClient
+    )
+    from .schedules import daily_schedule, daily_rollups, weekly_full_refresh, monthly_compaction
+    from .sensors import csv_upload_sensor, orders_microbatch_sensor, order_backfill_sensor
+    
+    # Data root and customer sample of the lineage assets: env defaults,
+    # overridable per run in run config (resources.settings.config)
+    settings = PipelineSettings.configure_at_launch(
+        data_root=os.getenv("DATA_ROOT", "data"),
+        sample_rate=float(os.getenv("SAMPLE_RATE", "1.0")),
+        seed=int(os.getenv("SAMPLE_SEED", "0"))
+    )
+    
+    # Define all resources; asset values of a sampled run (set here or in
+    # run config) are stored under the sample's root
+    resources = {
+        "settings": settings,
+        "io_manager": PipelineIOManager(settings=settings),
+        "duckdb": DuckDBResource(
+            database_path=os.getenv("DB_PATH", "data/warehouse.duckdb")
+        ),
+        "api_client": PublicAPIClient(
+            jsonplaceholder_url=os.getenv("JSONPLACEHOLDER_URL", "https://jsonplaceholder.typicode.com"),
+            fakestore_url=os.getenv("FAKESTOREAPI_URL", "https://fakestoreapi.com")
+        )
+    }
+    
+    # Combine everything
+    return Definitions(
+        assets=all_assets,
+        asset_checks=all_asset_checks,
+        resources=resources,
+        schedules=[daily_schedule, daily_rollups, weekly_full_refresh, monthly_compaction],
+        sensors=[csv_upload_sensor, orders_microbatch_sensor, order_backfill_sensor]
     )
-}
-
-# Combine everything
-defs = Definitions(
-    assets=all_assets,
-    resources=resources,
-    schedules=[daily_schedule, weekly_full_refresh],
-    sensors=[csv_upload_sensor]
-)
\ No newline at end of file
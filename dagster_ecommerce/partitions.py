@@ -0,0 +1,147 @@
+"""
+Partitioning shared by the order lineage
+raw_orders -> clean_orders -> daily_sales_summary all use order_partitions
+"""
+from __future__ import annotations
+import os
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, List, NamedTuple, Optional, Tuple
+from dagster import (
+    DailyPartitionsDefinition,
+    HourlyPartitionsDefinition,
+    MonthlyPartitionsDefinition,
+    MultiPartitionKey,
+    MultiPartitionsDefinition,
+    StaticPartitionsDefinition
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+START_DATE = "2024-01-01"
+
+# FakeStore product categories
+ORDER_CATEGORIES = os.getenv(
+    "ORDER_CATEGORIES",
+    "electronics,jewelery,men's clothing,women's clothing"
+).split(",")
+
+# order_ids are unique within a day: each slice of a day (hour or
+# category) numbers its orders from its own block
+ORDER_ID_BLOCK = 1_000_000
+
+# end_offset=1: the in-progress day/hour is a partition too, so micro-batches
+# can append to it; schedules still target the last closed one
+daily_partitions = DailyPartitionsDefinition(start_date=START_DATE, end_offset=1)
+hourly_partitions = HourlyPartitionsDefinition(start_date=f"{START_DATE}-00:00", end_offset=1)
+category_partitions = StaticPartitionsDefinition(ORDER_CATEGORIES)
+date_category_partitions = MultiPartitionsDefinition({
+    "date": daily_partitions,
+    "category": category_partitions
+})
+
+# Only completed months, used for compaction
+monthly_partitions = MonthlyPartitionsDefinition(start_date=START_DATE)
+
+# daily | hourly | date_category
+ORDER_PARTITIONING = os.getenv("ORDER_PARTITIONING", "daily")
+
+order_partitions = {
+    "daily": daily_partitions,
+    "hourly": hourly_partitions,
+    "date_category": date_category_partitions
+}[ORDER_PARTITIONING]
+
+
+class OrderSlice(NamedTuple):
+    """The slice of orders one partition covers"""
+
+    date: str
+    hour: Optional[int] = None
+    category: Optional[str] = None
+
+    @property
+    def path(self) -> str:
+        """Hive-style directory for this slice, e.g. date=2024-01-01/hour=05"""
+        path = f"date={self.date}"
+        if self.hour is not None:
+            path += f"/hour={self.hour:02d}"
+        if self.category is not None:
+            path += f"/category={self.category}"
+        return path
+
+    @property
+    def window(self) -> Tuple[str, str]:
+        """[start, end) of the slice's order_date, as ISO seconds strings"""
+        start = datetime.fromisoformat(self.date)
+        if self.hour is not None:
+            start += timedelta(hours=self.hour)
+            end = start + timedelta(hours=1)
+        else:
+            end = start + timedelta(days=1)
+        return start.isoformat(timespec="seconds"), end.isoformat(timespec="seconds")
+
+    @property
+    def first_order_id(self) -> int:
+        """First order_id of the slice's block"""
+        if self.hour is not None:
+            return self.hour * ORDER_ID_BLOCK + 1
+        if self.category is not None:
+            return ORDER_CATEGORIES.index(self.category) * ORDER_ID_BLOCK + 1
+        return 1
+
+
+def order_slice(partition_key) -> OrderSlice:
+    """Decode any order partition key"""
+    if isinstance(partition_key, MultiPartitionKey):
+        dims = partition_key.keys_by_dimension
+        return OrderSlice(date=dims["date"], category=dims["category"])
+    if len(partition_key) > 10:
+        # Hourly keys look like 2024-01-01-05:00
+        return OrderSlice(date=partition_key[:10], hour=int(partition_key[11:13]))
+    return OrderSlice(date=partition_key)
+
+
+def filter_orders(df: pd.DataFrame, order_slice: OrderSlice, until: Optional[str] = None) -> pd.DataFrame:
+    """Keep only the orders inside a slice (and before until), should the API return more"""
+    import pandas as pd
+    
+    if until is not None:
+        df = df[df['order_date'] < pd.Timestamp(until)]
+    if order_slice.hour is not None:
+        # order_date is a timestamp since bronze
+        df = df[df['order_date'].dt.hour == order_slice.hour]
+    if order_slice.category is not None:
+        df = df[df['category'] == order_slice.category]
+    return df.reset_index(drop=True)
+
+
+def _partition_keys(start: datetime) -> List[str]:
+    """Order partition keys of the day/hour starting at start"""
+    if ORDER_PARTITIONING == "hourly":
+        return [start.strftime("%Y-%m-%d-%H:00")]
+    if ORDER_PARTITIONING == "date_category":
+        return [
+            MultiPartitionKey({"date": start.strftime("%Y-%m-%d"), "category": category})
+            for category in ORDER_CATEGORIES
+        ]
+    return [start.strftime("%Y-%m-%d")]
+
+
+def open_partition_keys(now: datetime) -> List[str]:
+    """Keys of the day/hour still in progress at now (UTC)"""
+    if ORDER_PARTITIONING == "hourly":
+        return _partition_keys(now.replace(minute=0, second=0, microsecond=0))
+    return _partition_keys(now.replace(hour=0, minute=0, second=0, microsecond=0))
+
+
+def closed_partition_keys(now: datetime) -> List[str]:
+    """Keys of the last day/hour completed before now (UTC)"""
+    if ORDER_PARTITIONING == "hourly":
+        return _partition_keys(
+            now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=1)
+        )
+    return _partition_keys(
+        now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
+    )
@@ -0,0 +1,14 @@
+"""
+Concurrency pools: op-level slots shared by every run on the instance
+Pool limits are set per instance, e.g. `dagster instance concurrency set api 4`
+"""
+
+# Bronze: bound by the public APIs (and their shared rate limits)
+API_POOL = "api"
+
+# Silver/gold partition transforms: bound by CPU and memory
+CPU_POOL = "cpu"
+
+# Assets that rewrite one shared file (CLV, rollups, compaction manifests):
+# a single writer at a time
+WRITER_POOL = "single_writer"
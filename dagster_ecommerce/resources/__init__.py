@@ -1,10 +1,14 @@
 """Resources package"""
 from .database import PostgresResource, DuckDBResource
 from .api_client import PublicAPIClient, MockAPIClient
+from .settings import PipelineSettings
+from .io_manager import PipelineIOManager
 
 __all__ = [
     "PostgresResource",
     "DuckDBResource", 
     "PublicAPIClient",
-    "MockAPIClient"
+    "MockAPIClient",
+    "PipelineSettings",
+    "PipelineIOManager"
 ]
\ No newline at end of file
@@ -1,10 +1,36 @@
 """External API client resource - Dùng public APIs"""
 from dagster import ConfigurableResource
-import requests
-from typing import Dict, Any, List
-import time
+from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
-import random
+
+# FakeStore's product categories, which the mock catalog mirrors
+FAKESTORE_CATEGORIES = ["electronics", "jewelery", "men's clothing", "women's clothing"]
+
+# Synthetic signup dates count back from this day, so a user's
+# enrichment does not change between pulls
+SIGNUP_ANCHOR = "2025-01-01"
+
+
+def _stable_draws(ids, salt: int):
+    """
+    Pseudo-random uint64 per id (splitmix64), the same on every pull
+    Keeps enrichment stable, so snapshot hash-diffs only see real changes
+    """
+    import numpy as np
+    
+    with np.errstate(over="ignore"):
+        z = np.asarray(ids, dtype=np.uint64) + np.uint64(salt) * np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+
+def _stable_integers(ids, salt: int, low: int, high: int):
+    """Per-id integers in [low, high)"""
+    import numpy as np
+    
+    span = np.uint64(high - low)
+    return (_stable_draws(ids, salt) % span).astype(np.int64) + low
 
 
 class PublicAPIClient(ConfigurableResource):
@@ -17,95 +43,226 @@ class PublicAPIClient(ConfigurableResource):
     fakestore_url: str = "https://fakestoreapi.com"
     timeout: int = 30
     max_retries: int = 3
+    # Tail latency controls, see utils/http.py
+    hedge_requests: bool = True
+    hedge_quantile: float = 0.95
+    backoff_base: float = 0.5
+    backoff_cap: float = 10.0
+    breaker_failure_threshold: int = 5
+    breaker_reset_seconds: float = 30.0
+    # Requests/second shared by all processes on the host, by host or
+    # host/path prefix; adapts to 429s and latency (utils/ratelimit.py)
+    rate_limits: Dict[str, float] = {
+        "fakestoreapi.com": 5.0,
+        "jsonplaceholder.typicode.com": 5.0
+    }
+    # None: $RATE_LIMIT_DB, else $DATA_ROOT/rate_limits.sqlite
+    rate_limit_db: Optional[str] = None
+    # Longest wait for a token (Retry-After pauses included) before the
+    # attempt fails and is retried
+    rate_limit_max_wait: float = 300.0
     
-    def _make_request(self, url: str, params: Dict = None) -> Any:
-        """Make API request with retry logic"""
-        for attempt in range(self.max_retries):
-            try:
-                response = requests.get(url, params=params, timeout=self.timeout)
-                response.raise_for_status()
-                return response.json()
-            except requests.exceptions.RequestException as e:
-                if attempt == self.max_retries - 1:
-                    raise
-                time.sleep(2 ** attempt)  # Exponential backoff
+    def _make_request(self, url: str, params: Dict = None, raw: bool = False) -> Any:
+        """
+        Make API request with hedging, jittered retries and a circuit breaker
+        raw=True returns the undecoded body for columnar parsing
+        """
+        from ..utils.http import hedged_get
+        
+        response = hedged_get(
+            url,
+            params=params,
+            timeout=self.timeout,
+            max_retries=self.max_retries,
+            hedge=self.hedge_requests,
+            hedge_quantile=self.hedge_quantile,
+            backoff_base=self.backoff_base,
+            backoff_cap=self.backoff_cap,
+            failure_threshold=self.breaker_failure_threshold,
+            reset_seconds=self.breaker_reset_seconds,
+            limiter=self._rate_limiter(url),
+            limiter_max_wait=self.rate_limit_max_wait
+        )
+        return response.content if raw else response.json()
     
-    def get_orders(self, start_date: str, end_date: str) -> List[Dict]:
+    def _rate_limiter(self, url: str):
+        """Shared token bucket of the longest matching rate_limits key, if any"""
+        from urllib.parse import urlsplit
+        from ..utils.ratelimit import shared_bucket
+        
+        parts = urlsplit(url)
+        endpoint = f"{parts.netloc}{parts.path}"
+        matches = [key for key in self.rate_limits if endpoint.startswith(key)]
+        if not matches:
+            return None
+        key = max(matches, key=len)
+        return shared_bucket(key, self.rate_limits[key], db_path=self.rate_limit_db)
+    
+    def _products_payload(self):
+        """FakeStore catalog as an Arrow table (enrichment columns still null)"""
+        from ..schemas import PRODUCTS_PAYLOAD_SCHEMA, PRODUCTS_REQUIRED_KEYS
+        from ..utils.columnar import parse_json_records
+        
+        return parse_json_records(
+            self._make_request(f"{self.fakestore_url}/products", raw=True),
+            PRODUCTS_PAYLOAD_SCHEMA,
+            PRODUCTS_REQUIRED_KEYS
+        )
+    
+    def get_orders_table(self, start_date: str, end_date: str):
         """
-        Generate realistic orders data
-        Combines real products from FakeStore API with synthetic order data
+        Generate realistic orders data as an Arrow table
+        Combines real products from FakeStore API with synthetic order data,
+        generated column-wise instead of one dict per order
         """
+        import numpy as np
+        
         # Get real products from FakeStore API
-        products = self._make_request(f"{self.fakestore_url}/products")
+        products = self._products_payload()
         
-        # Generate orders for the date range
-        start = datetime.fromisoformat(start_date)
-        end = datetime.fromisoformat(end_date)
+        rng = np.random.default_rng()
+        start = np.datetime64(start_date, "D")
+        num_days = int((np.datetime64(end_date, "D") - start).astype(int)) + 1
         
-        orders = []
-        order_id = 1
-        
-        # Generate 50-100 orders per day
-        current_date = start
-        while current_date <= end:
-            num_orders = random.randint(50, 100)
-            
-            for _ in range(num_orders):
-                product = random.choice(products)
-                quantity = random.randint(1, 5)
-                
-                orders.append({
-                    "order_id": order_id,
-                    "customer_id": random.randint(1, 100),
-                    "product_id": product['id'],
-                    "product_name": product['title'],
-                    "category": product['category'],
-                    "quantity": quantity,
-                    "unit_price": round(product['price'], 2),
-                    "total_amount": round(product['price'] * quantity, 2),
-                    "order_date": current_date.isoformat(),
-                    "status": random.choice(["completed", "pending", "shipped"])
-                })
-                order_id += 1
-            
-            current_date += timedelta(days=1)
-        
-        return orders
+        # Generate 50-100 orders per day, at random times of day
+        per_day = rng.integers(50, 101, size=num_days)
+        num_orders = int(per_day.sum())
+        day_offsets = np.repeat(np.arange(num_days), per_day)
+        order_times = (
+            start.astype("datetime64[s]")
+            + day_offsets * np.timedelta64(86400, "s")
+            + rng.integers(0, 86400, size=num_orders).astype("timedelta64[s]")
+        )
+        
+        return self._orders_table(products, order_times, 1, rng)
     
-    def get_products(self) -> List[Dict]:
+    def get_new_orders_table(
+        self,
+        since: str,
+        until: str,
+        first_order_id: int = 1,
+        category: Optional[str] = None
+    ):
         """
-        Fetch real products from FakeStore API
+        Orders placed in [since, until), for partition slices and micro-batches
+        Same daily rate as get_orders_table, ids continue from first_order_id;
+        with a category only its products are ordered, at its share of the rate
         """
-        products = self._make_request(f"{self.fakestore_url}/products")
+        import numpy as np
+        import pyarrow.compute as pc
+        
+        products = self._products_payload()
+        catalog_size = max(products.num_rows, 1)
+        if category is not None:
+            products = products.filter(pc.equal(products["category"], category))
         
-        # Enrich with additional fields
-        for product in products:
-            product['stock'] = random.randint(10, 500)
-            product['supplier'] = random.choice([
-                "Global Electronics", "Fashion World", "Book Depot", 
-                "Jewelry Co", "Tech Supplies"
-            ])
+        rng = np.random.default_rng()
+        start = np.datetime64(since, "s")
+        seconds = int((np.datetime64(until, "s") - start).astype(int))
+        daily_rate = 75 * products.num_rows / catalog_size
+        num_orders = int(rng.poisson(daily_rate * max(seconds, 0) / 86400))
+        order_times = np.sort(
+            start + rng.integers(0, max(seconds, 1), size=num_orders).astype("timedelta64[s]")
+        )
         
-        return products
+        return self._orders_table(products, order_times, first_order_id, rng)
     
-    def get_users(self) -> List[Dict]:
+    def _orders_table(self, products, order_times, first_order_id: int, rng):
+        """Synthetic orders over the catalog, one per timestamp"""
+        import numpy as np
+        import pyarrow as pa
+        from ..schemas import ORDERS_PAYLOAD_SCHEMA
+        
+        num_orders = len(order_times)
+        picks = rng.integers(0, products.num_rows, size=num_orders)
+        prices = products["price"].to_numpy()[picks]
+        quantities = rng.integers(1, 6, size=num_orders)
+        
+        return pa.table({
+            "order_id": np.arange(first_order_id, first_order_id + num_orders),
+            "customer_id": rng.integers(1, 101, size=num_orders),
+            "product_id": products["id"].take(picks),
+            "product_name": products["title"].take(picks),
+            "category": products["category"].take(picks),
+            "quantity": quantities,
+            "unit_price": np.round(prices, 2),
+            "total_amount": np.round(prices * quantities, 2),
+            "order_date": np.datetime_as_string(order_times, unit="s"),
+            "status": rng.choice(["completed", "pending", "shipped"], size=num_orders)
+        }, schema=ORDERS_PAYLOAD_SCHEMA)
+    
+    def get_orders(self, start_date: str, end_date: str) -> List[Dict]:
+        """Generate realistic orders data"""
+        return self.get_orders_table(start_date, end_date).to_pylist()
+    
+    def get_products_table(self):
         """
-        Fetch real users from JSONPlaceholder API
+        Fetch real products from FakeStore API as an Arrow table
         """
-        users = self._make_request(f"{self.jsonplaceholder_url}/users")
+        import numpy as np
+        import pyarrow as pa
         
-        # Enrich user data
-        segments = ["Premium", "Standard", "Basic"]
+        products = self._products_payload()
+        ids = products["id"].to_numpy()
         
-        for user in users:
-            user['customer_id'] = user['id']
-            user['customer_segment'] = random.choice(segments)
-            user['signup_date'] = (
-                datetime.now() - timedelta(days=random.randint(30, 730))
-            ).date().isoformat()
-            user['total_lifetime_purchases'] = random.randint(1, 50)
+        # Enrich with additional fields, derived from the product id
+        suppliers = np.array([
+            "Global Electronics", "Fashion World", "Book Depot", 
+            "Jewelry Co", "Tech Supplies"
+        ])
+        products = products.set_column(
+            products.schema.get_field_index("stock"), "stock",
+            pa.array(_stable_integers(ids, 1, 10, 501), pa.int64())
+        )
+        return products.set_column(
+            products.schema.get_field_index("supplier"), "supplier",
+            pa.array(suppliers[_stable_integers(ids, 2, 0, len(suppliers))], pa.string())
+        )
+    
+    def get_products(self) -> List[Dict]:
+        """
+        Fetch real products from FakeStore API
+        """
+        return self.get_products_table().to_pylist()
+    
+    def get_users_table(self):
+        """
+        Fetch real users from JSONPlaceholder API as an Arrow table
+        """
+        import numpy as np
+        import pyarrow as pa
+        from ..schemas import USERS_PAYLOAD_SCHEMA, USERS_REQUIRED_KEYS
+        from ..utils.columnar import parse_json_records
+        
+        users = parse_json_records(
+            self._make_request(f"{self.jsonplaceholder_url}/users", raw=True),
+            USERS_PAYLOAD_SCHEMA,
+            USERS_REQUIRED_KEYS
+        )
+        ids = users["id"].to_numpy()
+        
+        # Enrich user data, derived from the user id
+        segments = np.array(["Premium", "Standard", "Basic"])
+        signup_dates = (
+            np.datetime64(SIGNUP_ANCHOR, "D")
+            - _stable_integers(ids, 3, 30, 731).astype("timedelta64[D]")
+        )
+        enrichment = {
+            "customer_id": users["id"],
+            "customer_segment": pa.array(segments[_stable_integers(ids, 4, 0, len(segments))]),
+            "signup_date": pa.array(np.datetime_as_string(signup_dates)),
+            "total_lifetime_purchases": pa.array(_stable_integers(ids, 5, 1, 51), pa.int64())
+        }
+        for name, values in enrichment.items():
+            users = users.set_column(users.schema.get_field_index(name), name, values)
         
         return users
+    
+    def get_users(self) -> List[Dict]:
+        """
+        Fetch real users from JSONPlaceholder API
+        """
+        return self.get_users_table().to_pylist()
 
 
 class MockAPIClient(ConfigurableResource):
@@ -113,45 +270,114 @@ class MockAPIClient(ConfigurableResource):
     Fallback mock client nếu không có internet
     """
     
+    def _order(self, fake, order_id: int, product: Dict, order_date: datetime) -> Dict:
+        """One mock order of a catalog product"""
+        quantity = fake.random_int(1, 5)
+        return {
+            "order_id": order_id,
+            "customer_id": fake.random_int(1, 100),
+            "product_id": product["id"],
+            "product_name": product["title"],
+            "category": product["category"],
+            "quantity": quantity,
+            "unit_price": product["price"],
+            "total_amount": round(product["price"] * quantity, 2),
+            "order_date": order_date.isoformat(),
+            "status": fake.random_element(["completed", "pending", "shipped"])
+        }
+    
     def get_orders(self, start_date: str, end_date: str) -> List[Dict]:
         """Return mock order data"""
         from faker import Faker
         fake = Faker()
+        products = self.get_products()
         
         start = datetime.fromisoformat(start_date)
         end = datetime.fromisoformat(end_date)
         days = (end - start).days + 1
         
-        orders = []
-        for i in range(days * 50):  # 50 orders per day
-            order_date = start + timedelta(days=i // 50)
-            orders.append({
-                "order_id": i + 1,
-                "customer_id": fake.random_int(1, 100),
-                "product_id": fake.random_int(1, 50),
-                "product_name": fake.word().title() + " " + fake.word().title(),
-                "category": fake.random_element(["Electronics", "Clothing", "Books", "Jewelry"]),
-                "quantity": fake.random_int(1, 5),
-                "unit_price": round(fake.random.uniform(10, 200), 2),
-                "total_amount": round(fake.random.uniform(10, 500), 2),
-                "order_date": order_date.isoformat(),
-                "status": fake.random_element(["completed", "pending", "shipped"])
-            })
-        
-        return orders
+        return [
+            self._order(
+                fake,
+                i + 1,
+                fake.random_element(products),
+                start + timedelta(days=i // 50, seconds=fake.random_int(0, 86399))
+            )
+            for i in range(days * 50)  # 50 orders per day
+        ]
+    
+    def get_new_orders(
+        self,
+        since: str,
+        until: str,
+        first_order_id: int = 1,
+        category: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Mock orders placed in [since, until), 50 per day on average
+        With a category only its products are ordered, at its share of the rate
+        """
+        from faker import Faker
+        fake = Faker()
+        catalog = self.get_products()
+        products = [p for p in catalog if category is None or p["category"] == category]
+        
+        start = datetime.fromisoformat(since)
+        seconds = max(int((datetime.fromisoformat(until) - start).total_seconds()), 0)
+        daily_rate = 50 * len(products) / len(catalog)
+        num_orders = int(daily_rate * seconds / 86400 + fake.random.random())
+        
+        offsets = sorted(fake.random_int(0, max(seconds - 1, 0)) for _ in range(num_orders))
+        return [
+            self._order(
+                fake,
+                first_order_id + i,
+                fake.random_element(products),
+                start + timedelta(seconds=offset)
+            )
+            for i, offset in enumerate(offsets)
+        ]
+    
+    def get_new_orders_table(
+        self,
+        since: str,
+        until: str,
+        first_order_id: int = 1,
+        category: Optional[str] = None
+    ):
+        """Mock slice or micro-batch orders as an Arrow table"""
+        from ..schemas import ORDERS_PAYLOAD_SCHEMA, ORDERS_REQUIRED_KEYS
+        from ..utils.columnar import parse_json_records
+        
+        return parse_json_records(
+            self.get_new_orders(since, until, first_order_id, category),
+            ORDERS_PAYLOAD_SCHEMA,
+            ORDERS_REQUIRED_KEYS
+        )
+    
+    def get_orders_table(self, start_date: str, end_date: str):
+        """Mock orders as an Arrow table"""
+        from ..schemas import ORDERS_PAYLOAD_SCHEMA, ORDERS_REQUIRED_KEYS
+        from ..utils.columnar import parse_json_records
+        
+        return parse_json_records(
+            self.get_orders(start_date, end_date),
+            ORDERS_PAYLOAD_SCHEMA,
+            ORDERS_REQUIRED_KEYS
+        )
     
     def get_products(self) -> List[Dict]:
         """Return mock product data"""
         from faker import Faker
         fake = Faker()
-        
-        categories = ["Electronics", "Clothing", "Books", "Jewelry", "Home"]
+        # Same snapshot on every call, like the real catalog
+        fake.seed_instance(1)
         
         return [
             {
                 "id": i,
                 "title": fake.word().title() + " " + fake.word().title(),
-                "category": fake.random_element(categories),
+                "category": fake.random_element(FAKESTORE_CATEGORIES),
                 "price": round(fake.random.uniform(5, 200), 2),
                 "stock": fake.random_int(0, 500),
                 "supplier": fake.company()
@@ -159,10 +385,19 @@ class MockAPIClient(ConfigurableResource):
             for i in range(1, 51)
         ]
     
+    def get_products_table(self):
+        """Mock products as an Arrow table"""
+        from ..schemas import PRODUCTS_PAYLOAD_SCHEMA, PRODUCTS_REQUIRED_KEYS
+        from ..utils.columnar import parse_json_records
+        
+        return parse_json_records(self.get_products(), PRODUCTS_PAYLOAD_SCHEMA, PRODUCTS_REQUIRED_KEYS)
+    
     def get_users(self) -> List[Dict]:
         """Return mock user data"""
         from faker import Faker
         fake = Faker()
+        # Same snapshot on every call, like the real catalog
+        fake.seed_instance(2)
         
         return [
             {
@@ -177,8 +412,17 @@ class MockAPIClient(ConfigurableResource):
                     "zipcode": fake.zipcode()
                 },
                 "customer_segment": fake.random_element(["Premium", "Standard", "Basic"]),
-                "signup_date": fake.date_between(start_date="-2y", end_date="today").isoformat(),
+                "signup_date": fake.date_between(
+                    start_date=datetime(2023, 1, 1), end_date=datetime(2024, 12, 31)
+                ).isoformat(),
                 "total_lifetime_purchases": fake.random_int(1, 50)
             }
             for i in range(1, 101)
-        ]
\ No newline at end of file
+        ]
+    
+    def get_users_table(self):
+        """Mock users as an Arrow table"""
+        from ..schemas import USERS_PAYLOAD_SCHEMA, USERS_REQUIRED_KEYS
+        from ..utils.columnar import parse_json_records
+        
+        return parse_json_records(self.get_users(), USERS_PAYLOAD_SCHEMA, USERS_REQUIRED_KEYS)
\ No newline at end of file
@@ -1,9 +1,11 @@
 """Database resources and connections"""
+from __future__ import annotations
 from dagster import ConfigurableResource, InitResourceContext
-from sqlalchemy import create_engine
-from sqlalchemy.engine import Engine
-import duckdb
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
+
+# Drivers are imported on first connection, not when definitions load
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
 
 
 class PostgresResource(ConfigurableResource):
@@ -17,6 +19,8 @@ class PostgresResource(ConfigurableResource):
     
     def get_engine(self) -> Engine:
         """Create SQLAlchemy engine"""
+        from sqlalchemy import create_engine
+        
         connection_string = (
             f"postgresql://{self.user}:{self.password}"
             f"@{self.host}:{self.port}/{self.database}"
@@ -37,6 +41,8 @@ class DuckDBResource(ConfigurableResource):
     
     def get_connection(self):
         """Get DuckDB connection"""
+        import duckdb
+        
         return duckdb.connect(self.database_path)
     
     def query(self, sql: str):
@@ -0,0 +1,27 @@
+"""Filesystem storage for asset values, isolated per sample"""
+from dagster import (
+    ConfigurableIOManagerFactory,
+    FilesystemIOManager,
+    InitResourceContext,
+    IOManager
+)
+from .settings import PipelineSettings
+
+
+class PipelineIOManager(ConfigurableIOManagerFactory):
+    """
+    Asset values go to the instance's storage directory, or under the
+    sample's own root when the run is sampled
+    settings is resolved per run, so sampling set in run config counts too
+    (pass the same PipelineSettings.configure_at_launch() as the top-level
+    settings resource)
+    """
+
+    settings: PipelineSettings
+
+    def create_io_manager(self, context: InitResourceContext) -> IOManager:
+        if self.settings.sampled:
+            base_dir = self.settings.path("storage")
+        else:
+            base_dir = context.instance.storage_directory() if context.instance else "storage"
+        return FilesystemIOManager(base_dir=base_dir).create_io_manager(context)
@@ -0,0 +1,52 @@
+"""Where the pipeline writes, and which customers it keeps"""
+from __future__ import annotations
+from dagster import ConfigurableResource, InitResourceContext
+from typing import TYPE_CHECKING, Dict
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class PipelineSettings(ConfigurableResource):
+    """
+    Data root and customer sampling shared by the lineage assets
+    With sample_rate < 1 only a deterministic hash-based sample of
+    customers (and their orders) flows from bronze to gold, under its own
+    root, so a sampled run never touches the full data
+    """
+
+    data_root: str = "data"
+    sample_rate: float = 1.0
+    seed: int = 0
+
+    def setup_for_execution(self, context: InitResourceContext) -> None:
+        """Reject a sample_rate outside (0, 1] before anything runs"""
+        if not 0 < self.sample_rate <= 1:
+            raise ValueError(f"sample_rate must be in (0, 1], got {self.sample_rate}")
+
+    @property
+    def sampled(self) -> bool:
+        return self.sample_rate < 1
+
+    @property
+    def root(self) -> str:
+        """data_root, or a directory of its own per sample"""
+        if not self.sampled:
+            return self.data_root
+        return f"{self.data_root}/samples/rate={self.sample_rate:g},seed={self.seed}"
+
+    def path(self, *parts: str) -> str:
+        """Path under the root, e.g. path("raw/orders")"""
+        return "/".join([self.root, *parts])
+
+    def sample(self, df: "pd.DataFrame", key: str = "customer_id") -> "pd.DataFrame":
+        """Rows of sampled customers"""
+        from ..utils.sampling import sample_frame
+
+        return sample_frame(df, self.sample_rate, self.seed, key)
+
+    def estimate(self, values) -> Dict[str, float]:
+        """Full-data total, with a 95% interval, from per-customer values"""
+        from ..utils.sampling import estimate_total
+
+        return estimate_total(values, self.sample_rate)
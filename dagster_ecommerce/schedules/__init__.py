@@ -1,4 +1,4 @@
 """Schedules package"""
-from .daily_schedule import daily_schedule, weekly_full_refresh
+from .daily_schedule import daily_schedule, daily_rollups, weekly_full_refresh, monthly_compaction
 
-__all__ = ["daily_schedule", "weekly_full_refresh"]
\ No newline at end of file
+__all__ = ["daily_schedule", "daily_rollups", "weekly_full_refresh", "monthly_compaction"]
\ No newline at end of file
@@ -1,11 +1,15 @@
 """Production schedules"""
 from dagster import (
+    AssetSelection,
+    RunRequest,
     ScheduleDefinition,
+    ScheduleEvaluationContext,
     DefaultScheduleStatus,
     build_schedule_from_partitioned_job,
-    define_asset_job
+    define_asset_job,
+    schedule
 )
-from ..assets.bronze.orders import daily_partitions
+from ..partitions import ORDER_PARTITIONING, closed_partition_keys
 
 
 # Job for daily incremental load
@@ -14,11 +18,35 @@ daily_etl_job = define_asset_job(
     selection=["raw_orders", "clean_orders", "daily_sales_summary"]
 )
 
-# Schedule to run every day at 2 AM
-daily_schedule = build_schedule_from_partitioned_job(
-    daily_etl_job,
-    hour_of_day=2,
-    minute_of_hour=0,  # ← ĐÂY! SỬA THÀNH minute_of_hour
+# Schedule to run every day at 2 AM (every hour with hourly partitions)
+@schedule(
+    name="daily_etl_job_schedule",
+    job=daily_etl_job,
+    cron_schedule="0 * * * *" if ORDER_PARTITIONING == "hourly" else "0 2 * * *",
+    default_status=DefaultScheduleStatus.RUNNING
+)
+def daily_schedule(context: ScheduleEvaluationContext):
+    """
+    Load the last closed partition
+    The in-progress one is only fed by the micro-batch sensor
+    """
+    for partition_key in closed_partition_keys(context.scheduled_execution_time):
+        yield RunRequest(
+            run_key=str(partition_key),
+            partition_key=partition_key
+        )
+
+
+# Period rollups, after the daily load has landed
+rollup_job = define_asset_job(
+    name="rollup_job",
+    selection=["weekly_sales", "monthly_sales", "yearly_sales"]
+)
+
+daily_rollups = ScheduleDefinition(
+    name="daily_rollups",
+    job=rollup_job,
+    cron_schedule="15 * * * *" if ORDER_PARTITIONING == "hourly" else "30 2 * * *",
     default_status=DefaultScheduleStatus.RUNNING
 )
 
@@ -26,7 +54,8 @@ daily_schedule = build_schedule_from_partitioned_job(
 # Full refresh job (weekly)
 full_refresh_job = define_asset_job(
     name="full_refresh_job",
-    selection="*"  # All assets
+    # All pipeline assets; maintenance runs on its own partitions
+    selection=AssetSelection.all() - AssetSelection.groups("maintenance")
 )
 
 weekly_full_refresh = ScheduleDefinition(
@@ -34,4 +63,20 @@ weekly_full_refresh = ScheduleDefinition(
     job=full_refresh_job,
     cron_schedule="0 3 * * 0",  # Every Sunday at 3 AM
     default_status=DefaultScheduleStatus.STOPPED
-)
\ No newline at end of file
+)
+
+
+# Compaction of last month's small files
+compaction_job = define_asset_job(
+    name="compaction_job",
+    selection=["compacted_order_files"]
+)
+
+# 2nd of every month at 4 AM, once the month is closed
+monthly_compaction = build_schedule_from_partitioned_job(
+    compaction_job,
+    day_of_month=2,
+    hour_of_day=4,
+    minute_of_hour=0,
+    default_status=DefaultScheduleStatus.STOPPED
+)
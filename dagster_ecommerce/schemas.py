@@ -0,0 +1,238 @@
+"""
+Declared Arrow schemas for API payloads and for every layer's outputs
+Imported at execution time only (pulls in pyarrow)
+"""
+import pyarrow as pa
+
+
+# JSONPlaceholder /users, plus the enrichment fields added by the client
+USERS_PAYLOAD_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("customer_id", pa.int64()),
+    ("name", pa.string()),
+    ("username", pa.string()),
+    ("email", pa.string()),
+    ("phone", pa.string()),
+    ("website", pa.string()),
+    ("address", pa.struct([
+        ("street", pa.string()),
+        ("suite", pa.string()),
+        ("city", pa.string()),
+        ("zipcode", pa.string()),
+        ("geo", pa.struct([("lat", pa.string()), ("lng", pa.string())])),
+    ])),
+    ("company", pa.struct([
+        ("name", pa.string()),
+        ("catchPhrase", pa.string()),
+        ("bs", pa.string()),
+    ])),
+    ("customer_segment", pa.string()),
+    ("signup_date", pa.string()),
+    ("total_lifetime_purchases", pa.int64()),
+])
+# Keys a payload must carry; the rest may be absent (nulls) or enriched
+USERS_REQUIRED_KEYS = ("id", "name", "email")
+
+# FakeStore /products, plus stock/supplier enrichment
+PRODUCTS_PAYLOAD_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("title", pa.string()),
+    ("price", pa.float64()),
+    ("description", pa.string()),
+    ("category", pa.string()),
+    ("image", pa.string()),
+    ("rating", pa.struct([("rate", pa.float64()), ("count", pa.int64())])),
+    ("stock", pa.int64()),
+    ("supplier", pa.string()),
+])
+PRODUCTS_REQUIRED_KEYS = ("id", "title", "price", "category")
+
+# Synthetic orders built on the product catalog
+ORDERS_PAYLOAD_SCHEMA = pa.schema([
+    ("order_id", pa.int64()),
+    ("customer_id", pa.int64()),
+    ("product_id", pa.int64()),
+    ("product_name", pa.string()),
+    ("category", pa.string()),
+    ("quantity", pa.int64()),
+    ("unit_price", pa.float64()),
+    ("total_amount", pa.float64()),
+    ("order_date", pa.string()),
+    ("status", pa.string()),
+])
+ORDERS_REQUIRED_KEYS = tuple(ORDERS_PAYLOAD_SCHEMA.names)
+
+# Flattened nested fields -> bronze column names
+USERS_FLAT_NAMES = {
+    "address.city": "city",
+    "address.street": "street",
+    "address.zipcode": "zipcode",
+    "address.suite": "suite",
+    "address.geo.lat": "geo_lat",
+    "address.geo.lng": "geo_lng",
+    "company.name": "company_name",
+    "company.catchPhrase": "company_catch_phrase",
+    "company.bs": "company_bs",
+}
+
+PRODUCTS_FLAT_NAMES = {
+    "rating.rate": "rating_rate",
+    "rating.count": "rating_count",
+}
+
+
+# Layer contracts: the types each asset's files are written and read with.
+# Strings are parsed once, at bronze; low-cardinality labels are
+# dictionary-encoded (pandas categoricals). Amounts stay float64: pandas
+# has no native decimal dtype, and object Decimals would slow every sum.
+TIMESTAMP = pa.timestamp("us")
+LABEL = pa.dictionary(pa.int32(), pa.string())
+
+RAW_ORDERS_SCHEMA = pa.schema([
+    ("order_id", pa.int64()),
+    ("customer_id", pa.int64()),
+    ("product_id", pa.int64()),
+    ("product_name", pa.string()),
+    ("category", LABEL),
+    ("quantity", pa.int64()),
+    ("unit_price", pa.float64()),
+    ("total_amount", pa.float64()),
+    ("order_date", TIMESTAMP),
+    ("status", LABEL),
+])
+
+RAW_CUSTOMERS_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("customer_id", pa.int64()),
+    ("name", pa.string()),
+    ("username", pa.string()),
+    ("email", pa.string()),
+    ("phone", pa.string()),
+    ("website", pa.string()),
+    ("street", pa.string()),
+    ("suite", pa.string()),
+    ("city", pa.string()),
+    ("zipcode", pa.string()),
+    ("geo_lat", pa.string()),
+    ("geo_lng", pa.string()),
+    ("company_name", pa.string()),
+    ("company_catch_phrase", pa.string()),
+    ("company_bs", pa.string()),
+    ("customer_segment", LABEL),
+    ("signup_date", TIMESTAMP),
+    ("total_lifetime_purchases", pa.int64()),
+    ("first_name", pa.string()),
+    ("last_name", pa.string()),
+])
+
+RAW_PRODUCTS_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("title", pa.string()),
+    ("price", pa.float64()),
+    ("description", pa.string()),
+    ("category", LABEL),
+    ("image", pa.string()),
+    ("rating_rate", pa.float64()),
+    ("rating_count", pa.int64()),
+    ("stock", pa.int64()),
+    ("supplier", LABEL),
+])
+
+# Snapshot CDC deltas (utils/cdc.py): the snapshot's columns plus the
+# change kind; deleted rows carry only the key
+CHANGE_FIELD = pa.field("_change", LABEL)
+RAW_CUSTOMERS_DELTA_SCHEMA = RAW_CUSTOMERS_SCHEMA.append(CHANGE_FIELD)
+RAW_PRODUCTS_DELTA_SCHEMA = RAW_PRODUCTS_SCHEMA.append(CHANGE_FIELD)
+
+CLEAN_ORDERS_SCHEMA = pa.schema([
+    *RAW_ORDERS_SCHEMA,
+    ("year", pa.int32()),
+    ("month", pa.int32()),
+    ("day_of_week", LABEL),
+])
+
+CLEAN_CUSTOMERS_SCHEMA = pa.schema([
+    *RAW_CUSTOMERS_SCHEMA,
+    ("email_valid", pa.bool_()),
+    ("full_name", pa.string()),
+    ("customer_age_days", pa.int64()),
+])
+
+DAILY_SALES_SCHEMA = pa.schema([
+    ("date", TIMESTAMP),
+    ("category", LABEL),
+    ("num_orders", pa.int64()),
+    ("total_revenue", pa.float64()),
+    ("avg_order_value", pa.float64()),
+    ("total_quantity", pa.int64()),
+    ("unique_customers", pa.int64()),
+    ("revenue_per_customer", pa.float64()),
+])
+
+# daily_sales_summary's side files, next to each sales.parquet: the aggregates
+# micro-batches fold into, and the sums + customer sketch the rollups merge
+DAILY_SALES_AGGREGATES_SCHEMA = pa.schema([
+    ("date", TIMESTAMP),
+    ("category", LABEL),
+    ("num_orders", pa.int64()),
+    ("total_revenue", pa.float64()),
+    ("total_quantity", pa.int64()),
+])
+
+DAILY_SALES_CUSTOMERS_SCHEMA = pa.schema([
+    ("date", TIMESTAMP),
+    ("category", LABEL),
+    ("customer_id", pa.int64()),
+])
+
+DAILY_SALES_ROLLUP_SCHEMA = pa.schema([
+    *DAILY_SALES_AGGREGATES_SCHEMA,
+    ("customers_hll", pa.binary()),
+])
+
+# sales_rollups' stored week/month/year files, sketches included
+SALES_ROLLUPS_SCHEMA = pa.schema([
+    ("period_start", TIMESTAMP),
+    ("category", LABEL),
+    ("num_orders", pa.int64()),
+    ("total_revenue", pa.float64()),
+    ("total_quantity", pa.int64()),
+    ("unique_customers", pa.int64()),
+    ("customers_hll", pa.binary()),
+])
+
+CUSTOMER_LIFETIME_VALUE_SCHEMA = pa.schema([
+    ("customer_id", pa.int64()),
+    ("total_orders", pa.int64()),
+    ("lifetime_value", pa.float64()),
+    ("avg_order_value", pa.float64()),
+    ("first_order_date", TIMESTAMP),
+    ("last_order_date", TIMESTAMP),
+    ("full_name", pa.string()),
+    ("email", pa.string()),
+    ("customer_segment", LABEL),
+    ("customer_age_days", pa.float64()),
+    ("days_since_last_order", pa.int64()),
+    ("recency_score", pa.int64()),
+    ("frequency_score", pa.int64()),
+    ("monetary_score", pa.int64()),
+    ("rfm_score", pa.int64()),
+    ("rfm_segment", LABEL),
+])
+
+# Asset (or asset side file) name -> contract
+ASSET_SCHEMAS = {
+    "raw_orders": RAW_ORDERS_SCHEMA,
+    "raw_customers": RAW_CUSTOMERS_SCHEMA,
+    "raw_products": RAW_PRODUCTS_SCHEMA,
+    "raw_customers_delta": RAW_CUSTOMERS_DELTA_SCHEMA,
+    "raw_products_delta": RAW_PRODUCTS_DELTA_SCHEMA,
+    "clean_orders": CLEAN_ORDERS_SCHEMA,
+    "clean_customers": CLEAN_CUSTOMERS_SCHEMA,
+    "daily_sales_summary": DAILY_SALES_SCHEMA,
+    "daily_sales_aggregates": DAILY_SALES_AGGREGATES_SCHEMA,
+    "daily_sales_customers": DAILY_SALES_CUSTOMERS_SCHEMA,
+    "daily_sales_rollup": DAILY_SALES_ROLLUP_SCHEMA,
+    "sales_rollups": SALES_ROLLUPS_SCHEMA,
+    "customer_lifetime_value": CUSTOMER_LIFETIME_VALUE_SCHEMA,
+}
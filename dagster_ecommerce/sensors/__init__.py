@@ -1,4 +1,6 @@
 """Sensors package"""
 from .file_sensor import csv_upload_sensor
+from .microbatch_sensor import orders_microbatch_sensor
+from .backfill_sensor import order_backfill_sensor
 
-__all__ = ["csv_upload_sensor"]
\ No newline at end of file
+__all__ = ["csv_upload_sensor", "orders_microbatch_sensor", "order_backfill_sensor"]
\ No newline at end of file
@@ -0,0 +1,233 @@
+"""Layer-pipelined backfills of the order lineage, newest dates first"""
+import json
+import time
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from dagster import (
+    sensor,
+    DagsterRunStatus,
+    DefaultSensorStatus,
+    RunRequest,
+    RunsFilter,
+    SensorEvaluationContext,
+    SkipReason,
+    define_asset_job
+)
+from ..partitions import order_partitions, order_slice
+
+
+BACKFILL_DIR = "data/backfills"
+# Requests of finished backfills move here; their status files stay put
+ARCHIVE_DIR = f"{BACKFILL_DIR}/archive"
+
+BACKFILL_TAG = "ecommerce/backfill"
+LAYER_TAG = "ecommerce/layer"
+
+# Layers in lineage order, each a job over one asset
+LAYERS = ["bronze", "silver", "gold"]
+LAYER_ASSETS = {
+    "bronze": "raw_orders",
+    "silver": "clean_orders",
+    "gold": "daily_sales_summary"
+}
+
+# Runs in flight per layer and backfill; dagster_home/dagster.yaml caps
+# the same tags instance-wide
+DEFAULT_LIMITS = {"bronze": 4, "silver": 3, "gold": 3}
+DEFAULT_MAX_ATTEMPTS = 2
+
+# One job per layer, tagged so the run queue can limit each layer
+layer_jobs = {
+    layer: define_asset_job(
+        name=f"{layer}_orders_job",
+        selection=[asset],
+        tags={LAYER_TAG: layer}
+    )
+    for layer, asset in LAYER_ASSETS.items()
+}
+
+_DONE = {DagsterRunStatus.SUCCESS}
+_FAILED = {DagsterRunStatus.FAILURE, DagsterRunStatus.CANCELED}
+
+
+def backfill_keys(start: str, end: str) -> List[str]:
+    """Order partition keys with a date in [start, end], newest first"""
+    keys = [
+        key for key in order_partitions.get_partition_keys()
+        if start <= order_slice(key).date <= end
+    ]
+    return [str(key) for key in reversed(keys)]
+
+
+def plan_steps(
+    keys: List[str],
+    state: Dict[Tuple[str, str], Tuple[str, int]],
+    limits: Dict[str, int],
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+) -> List[Tuple[str, str]]:
+    """
+    (layer, key) steps to launch now
+    - state maps (layer, key) to (status, attempts): done/failed/running
+    - A layer runs for a key once the previous layer is done, so the
+      layers pipeline: gold for one day runs while bronze fetches the next
+    - keys come newest first, so recent dates land first; downstream layers
+      are planned first, finishing days already started before opening more
+    """
+    in_flight = {layer: 0 for layer in LAYERS}
+    for (layer, _), (status, _) in state.items():
+        if status == "running":
+            in_flight[layer] += 1
+
+    steps = []
+    for depth in reversed(range(len(LAYERS))):
+        layer = LAYERS[depth]
+        for key in keys:
+            if in_flight[layer] >= limits.get(layer, 1):
+                break
+            if depth and state.get((LAYERS[depth - 1], key), ("", 0))[0] != "done":
+                continue
+            status, attempts = state.get((layer, key), ("", 0))
+            if status == "" or (status == "failed" and attempts < max_attempts):
+                steps.append((layer, key))
+                in_flight[layer] += 1
+    return steps
+
+
+def failed_out(
+    key: str,
+    state: Dict[Tuple[str, str], Tuple[str, int]],
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+) -> bool:
+    """True once a layer of key failed max_attempts times: it is not retried again"""
+    for layer in LAYERS:
+        status, attempts = state.get((layer, key), ("", 0))
+        if status == "failed" and attempts >= max_attempts:
+            return True
+    return False
+
+
+def backfill_state(
+    keys: List[str],
+    state: Dict[Tuple[str, str], Tuple[str, int]],
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+) -> str:
+    """
+    running until every key is done at the last layer (complete) or
+    failed out (failed, if any did)
+    """
+    done = [state.get((LAYERS[-1], key), ("", 0))[0] == "done" for key in keys]
+    if all(done):
+        return "complete"
+    if all(d or failed_out(key, state, max_attempts) for d, key in zip(done, keys)):
+        return "failed"
+    return "running"
+
+
+def backfill_progress(
+    keys: List[str],
+    state: Dict[Tuple[str, str], Tuple[str, int]],
+    started_at: Optional[float],
+    now: float,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+) -> Dict:
+    """Overall state, counts per layer and status, with throughput in partitions/hour"""
+    counts = {
+        layer: {
+            status: sum(state.get((layer, key), ("pending", 0))[0] == status for key in keys)
+            for status in ("pending", "running", "done", "failed")
+        }
+        for layer in LAYERS
+    }
+    completed = counts[LAYERS[-1]]["done"]
+    hours = (now - started_at) / 3600 if started_at is not None else 0.0
+    rate = completed / hours if hours > 0 else 0.0
+    remaining = len(keys) - completed
+    return {
+        "state": backfill_state(keys, state, max_attempts),
+        "partitions": len(keys),
+        "completed": completed,
+        "failed_out": sum(failed_out(key, state, max_attempts) for key in keys),
+        "layers": counts,
+        "partitions_per_hour": round(rate, 2),
+        "eta_hours": round(remaining / rate, 2) if rate else None
+    }
+
+
+def _run_state(context: SensorEvaluationContext, name: str):
+    """(layer, key) -> (status, attempts), and when the backfill's first run was created"""
+    records = context.instance.get_run_records(filters=RunsFilter(tags={BACKFILL_TAG: name}))
+    state: Dict[Tuple[str, str], Tuple[str, int]] = {}
+    started_at = None
+    # Oldest first, so the latest attempt decides the status
+    for record in sorted(records, key=lambda r: r.create_timestamp):
+        run = record.dagster_run
+        step = (run.tags.get(LAYER_TAG), run.tags.get("dagster/partition"))
+        if run.status in _DONE:
+            status = "done"
+        elif run.status in _FAILED:
+            status = "failed"
+        else:
+            status = "running"
+        state[step] = (status, state.get(step, ("", 0))[1] + 1)
+        created = record.create_timestamp.timestamp()
+        started_at = created if started_at is None else min(started_at, created)
+    return state, started_at
+
+
+@sensor(
+    jobs=list(layer_jobs.values()),
+    minimum_interval_seconds=30,
+    default_status=DefaultSensorStatus.STOPPED
+)
+def order_backfill_sensor(context: SensorEvaluationContext):
+    """
+    Drive backfills requested as data/backfills/<name>.json
+    {"start": "2024-01-01", "end": "2024-03-31", "limits": {"bronze": 4}}
+    Progress and partitions/hour are written to <name>.status.json; once
+    the backfill is complete or failed its request moves to archive/
+    """
+    requests = sorted(Path(BACKFILL_DIR).glob("*.json"))
+    requests = [p for p in requests if not p.name.endswith(".status.json")]
+    if not requests:
+        return SkipReason(f"No backfill requests in {BACKFILL_DIR}")
+
+    run_requests = []
+    for path in requests:
+        name = path.stem
+        request = json.loads(path.read_text())
+        end = request.get("end", date.today().isoformat())
+        keys = backfill_keys(request["start"], end)
+        limits = {**DEFAULT_LIMITS, **request.get("limits", {})}
+        max_attempts = request.get("max_attempts", DEFAULT_MAX_ATTEMPTS)
+
+        state, started_at = _run_state(context, name)
+        steps = plan_steps(keys, state, limits, max_attempts)
+        for layer, key in steps:
+            attempt = state.get((layer, key), ("", 0))[1] + 1
+            run_requests.append(RunRequest(
+                run_key=f"{name}:{layer}:{key}:{attempt}",
+                job_name=layer_jobs[layer].name,
+                partition_key=key,
+                tags={
+                    BACKFILL_TAG: name,
+                    # Downstream layers jump the queue: they complete days
+                    "dagster/priority": str(LAYERS.index(layer))
+                }
+            ))
+            state[(layer, key)] = ("running", attempt)
+
+        progress = backfill_progress(keys, state, started_at, time.time(), max_attempts)
+        path.with_suffix(".status.json").write_text(json.dumps(progress, indent=2))
+        context.log.info(
+            f"Backfill {name} ({progress['state']}): {progress['completed']}/{progress['partitions']} "
+            f"partitions, {progress['partitions_per_hour']} partitions/hour, {len(steps)} steps launched"
+        )
+        if progress["state"] != "running":
+            # Nothing left to launch or wait on: stop evaluating it
+            Path(ARCHIVE_DIR).mkdir(parents=True, exist_ok=True)
+            path.replace(Path(ARCHIVE_DIR) / path.name)
+
+    if not run_requests:
+        return SkipReason("Backfills waiting on running steps, or finished")
+    return run_requests
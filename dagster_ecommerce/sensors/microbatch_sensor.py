@@ -0,0 +1,68 @@
+"""Near-real-time micro-batches for the in-progress order partition"""
+import os
+from datetime import datetime, timezone
+from dagster import (
+    sensor,
+    DagsterRunStatus,
+    DefaultSensorStatus,
+    RunRequest,
+    RunsFilter,
+    SkipReason,
+    SensorEvaluationContext,
+    define_asset_job
+)
+from ..assets.bronze import RAW_ORDERS_OP
+from ..partitions import open_partition_keys
+
+
+MICROBATCH_INTERVAL_SECONDS = int(os.getenv("MICROBATCH_INTERVAL_SECONDS", "30"))
+
+MICROBATCH_ASSETS = ["raw_orders", "clean_orders", "daily_sales_summary"]
+
+# Same assets as daily_etl_job, run in append mode
+microbatch_job = define_asset_job(
+    name="microbatch_job",
+    selection=MICROBATCH_ASSETS
+)
+
+
+@sensor(
+    job=microbatch_job,
+    minimum_interval_seconds=MICROBATCH_INTERVAL_SECONDS,
+    default_status=DefaultSensorStatus.STOPPED
+)
+def orders_microbatch_sensor(context: SensorEvaluationContext):
+    """
+    Append new orders to today's partition and update its summary
+    Waits for the previous micro-batch, so appends never overlap
+    """
+    in_flight = context.instance.get_runs(
+        filters=RunsFilter(
+            job_name=microbatch_job.name,
+            statuses=[
+                DagsterRunStatus.QUEUED,
+                DagsterRunStatus.NOT_STARTED,
+                DagsterRunStatus.STARTING,
+                DagsterRunStatus.STARTED
+            ]
+        ),
+        limit=1
+    )
+    if in_flight:
+        return SkipReason(f"Micro-batch {in_flight[0].run_id} still running")
+    
+    now = datetime.now(timezone.utc)
+    run_config = {
+        "ops": {
+            RAW_ORDERS_OP if name == "raw_orders" else name: {"config": {"append": True}}
+            for name in MICROBATCH_ASSETS
+        }
+    }
+    return [
+        RunRequest(
+            partition_key=partition_key,
+            run_config=run_config,
+            tags={"ecommerce/microbatch_requested_at": now.isoformat()}
+        )
+        for partition_key in open_partition_keys(now)
+    ]
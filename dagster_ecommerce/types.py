@@ -0,0 +1,15 @@
+"""Dagster types that avoid importing pandas when definitions load"""
+from dagster import DagsterType
+
+
+def _is_dataframe(_context, value) -> bool:
+    import pandas as pd
+    return isinstance(value, pd.DataFrame)
+
+
+# Used as the annotation on asset inputs/outputs instead of pd.DataFrame
+DataFrame = DagsterType(
+    name="DataFrame",
+    type_check_fn=_is_dataframe,
+    description="pandas DataFrame"
+)
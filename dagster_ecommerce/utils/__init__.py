@@ -1,4 +1,30 @@
 """Utilities package"""
-from .validators import DataValidator
+from importlib import import_module
 
-__all__ = ["DataValidator"]
\ No newline at end of file
+# Re-exports resolve on first access so importing the package
+# does not pull in pandas/numpy/pyarrow
+_EXPORTS = {
+    "DataValidator": ".validators",
+    "ParallelConfig": ".parallel",
+    "run_chunked": ".parallel",
+    "score_by_boundaries": ".sketches",
+    "CustomerIndex": ".customer_index",
+    "write_customer_index": ".customer_index",
+    "parse_json_records": ".columnar",
+    "undeclared_keys": ".columnar",
+    "flatten_table": ".columnar",
+    "SnapshotStore": ".cdc",
+    "SnapshotSyncConfig": ".cdc",
+    "product_dimension": ".dimensions",
+    "SchemaDriftError": ".contracts",
+    "write_contract": ".contracts",
+    "read_contract": ".contracts",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(_EXPORTS[name], __name__), name)
\ No newline at end of file
@@ -0,0 +1,270 @@
+"""Compaction of small per-day parquet files, with a pruning manifest"""
+import json
+import os
+import tempfile
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from .contracts import contract, to_frame
+
+
+DATA_ROOT = "data"
+COMPACTED_ROOT = f"{DATA_ROOT}/compacted"
+
+# name -> (daily source dir under the data root, sort keys)
+COMPACTION_DATASETS = {
+    "raw_orders": ("raw/orders", ["customer_id", "product_id"]),
+    "clean_orders": ("staging/orders", ["customer_id", "product_id"]),
+    "daily_sales": ("processed/daily_sales", ["category"]),
+}
+
+# name -> column holding each row's date
+COMPACTION_DATE_COLUMNS = {
+    "raw_orders": "order_date",
+    "clean_orders": "order_date",
+    "daily_sales": "date",
+}
+
+
+def source_root(name: str, data_root: str = DATA_ROOT) -> Path:
+    return Path(data_root) / COMPACTION_DATASETS[name][0]
+
+
+def _atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write to a temp file next to path, then rename over it"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def manifest_path(name: str, root: str = COMPACTED_ROOT) -> Path:
+    return Path(root) / name / "_manifest.json"
+
+
+def read_manifest(name: str, root: str = COMPACTED_ROOT) -> Dict:
+    """Manifest: {"files": [{path, start_date, end_date, num_rows, stats}]}"""
+    path = manifest_path(name, root)
+    if not path.exists():
+        return {"files": []}
+    return json.loads(path.read_text())
+
+
+def source_files(root, start_date: str, end_date: str) -> List[Path]:
+    """Per-day parquet files under date=YYYY-MM-DD dirs within [start, end]"""
+    files = []
+    for date_dir in sorted(Path(root).glob("date=*")):
+        day = date_dir.name[len("date="):]
+        if start_date <= day <= end_date:
+            # _-prefixed files are sidecar state, not data
+            files.extend(
+                f for f in sorted(date_dir.rglob("*.parquet"))
+                if not f.name.startswith("_")
+            )
+    return files
+
+
+def column_stats(table: pa.Table) -> Dict[str, List]:
+    """min/max for every numeric, temporal and string column"""
+    stats = {}
+    for name in table.column_names:
+        column = table[name]
+        if not (
+            pa.types.is_integer(column.type)
+            or pa.types.is_floating(column.type)
+            or pa.types.is_temporal(column.type)
+            or pa.types.is_string(column.type)
+        ):
+            continue
+        result = pc.min_max(column)
+        stats[name] = [result["min"].as_py(), result["max"].as_py()]
+    return stats
+
+
+def compact_range(
+    name: str,
+    start_date: str,
+    end_date: str,
+    label: str,
+    row_group_size: int = 128_000,
+    delete_sources: bool = False,
+    root: str = COMPACTED_ROOT,
+    data_root: str = DATA_ROOT
+) -> Optional[Dict]:
+    """
+    Rewrite one closed date range of a dataset into a single file
+    - Sorted by the dataset's keys so row-group stats prune well
+    - zstd, fixed row-group size, column statistics
+    - Manifest entry for the file is replaced atomically
+    """
+    sort_by = COMPACTION_DATASETS[name][1]
+    files = source_files(source_root(name, data_root), start_date, end_date)
+    if not files:
+        return None
+
+    table = pa.concat_tables(
+        [pq.read_table(f) for f in files],
+        promote_options="permissive"
+    )
+    sort_keys = [(c, "ascending") for c in sort_by if c in table.column_names]
+    if sort_keys:
+        table = table.sort_by(sort_keys)
+
+    out_path = Path(root) / name / f"{label}.parquet"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_suffix(".parquet.tmp")
+    pq.write_table(
+        table,
+        tmp_path,
+        compression="zstd",
+        row_group_size=row_group_size,
+        write_statistics=True
+    )
+    os.replace(tmp_path, out_path)
+
+    entry = {
+        "path": str(out_path),
+        "start_date": start_date,
+        "end_date": end_date,
+        "num_rows": table.num_rows,
+        "num_source_files": len(files),
+        "stats": column_stats(table)
+    }
+    manifest = read_manifest(name, root)
+    manifest["files"] = sorted(
+        [f for f in manifest["files"] if f["path"] != entry["path"]] + [entry],
+        key=lambda f: f["start_date"]
+    )
+    _atomic_write_bytes(
+        manifest_path(name, root),
+        json.dumps(manifest, indent=2, default=str).encode()
+    )
+
+    if delete_sources:
+        for f in files:
+            f.unlink()
+
+    return entry
+
+
+def prune_files(
+    name: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    equals: Optional[Dict] = None,
+    root: str = COMPACTED_ROOT
+) -> List[str]:
+    """Compacted files that may hold matching rows, decided from the manifest alone"""
+    equals = equals or {}
+    selected = []
+    for entry in read_manifest(name, root)["files"]:
+        if start_date and entry["end_date"] < start_date:
+            continue
+        if end_date and entry["start_date"] > end_date:
+            continue
+        bounds = [entry["stats"].get(column) for column in equals]
+        if any(
+            b is not None and not (b[0] <= value <= b[1])
+            for b, value in zip(bounds, equals.values())
+        ):
+            continue
+        selected.append(entry["path"])
+    return selected
+
+
+def read_compacted(
+    name: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    equals: Optional[Dict] = None,
+    columns: Optional[List[str]] = None,
+    root: str = COMPACTED_ROOT
+) -> pd.DataFrame:
+    """
+    Read a compacted dataset without listing directories
+    Files are pruned by the manifest, row groups by parquet statistics
+    """
+    equals = equals or {}
+    filters = [(column, "=", value) for column, value in equals.items()] or None
+    tables = [
+        pq.read_table(path, columns=columns, filters=filters)
+        for path in prune_files(name, start_date, end_date, equals, root)
+    ]
+    if not tables:
+        return pd.DataFrame(columns=columns)
+    return pa.concat_tables(tables, promote_options="permissive").to_pandas()
+
+
+def _day(path: Path) -> str:
+    """Date of a per-day file, from its date=YYYY-MM-DD directory"""
+    return next(p.name[len("date="):] for p in path.parents if p.name.startswith("date="))
+
+
+def _drop_days(table: pa.Table, column: str, days: List[str]) -> pa.Table:
+    """Rows of table whose date column is not on one of days"""
+    mask = None
+    for day in days:
+        start = pd.Timestamp(day)
+        on_day = pc.and_(
+            pc.greater_equal(table[column], pa.scalar(start, table[column].type)),
+            pc.less(table[column], pa.scalar(start + pd.Timedelta(days=1), table[column].type))
+        )
+        mask = on_day if mask is None else pc.or_(mask, on_day)
+    return table if mask is None else table.filter(pc.invert(mask))
+
+
+def read_dataset(
+    name: str,
+    asset: str,
+    columns: Optional[List[str]] = None,
+    root: str = COMPACTED_ROOT,
+    data_root: str = DATA_ROOT
+) -> pd.DataFrame:
+    """
+    Every row of a dataset, typed by its asset's contract, read from
+    compacted files where they are current
+    - A compacted file replaces the per-day files of its range; a day
+      re-materialized since (its files are newer) is read from its own
+      files and its rows in the compacted file are skipped
+    - Days no manifest entry covers are read from their per-day files
+    """
+    schema = contract(asset)
+    date_column = COMPACTION_DATE_COLUMNS[name]
+    names = columns or schema.names
+    read_names = names if date_column in names else [*names, date_column]
+    
+    daily_root = source_root(name, data_root)
+    daily = {}
+    for f in source_files(daily_root, "", "9999-12-31"):
+        daily.setdefault(_day(f), []).append(f)
+    
+    tables, compacted_days = [], set()
+    for entry in read_manifest(name, root)["files"]:
+        compacted = Path(entry["path"])
+        if not compacted.exists():
+            continue
+        mtime = compacted.stat().st_mtime_ns
+        days = [day for day in daily if entry["start_date"] <= day <= entry["end_date"]]
+        stale = [day for day in days if any(f.stat().st_mtime_ns > mtime for f in daily[day])]
+        tables.append(_drop_days(pq.read_table(compacted, columns=read_names), date_column, stale))
+        compacted_days.update(day for day in days if day not in stale)
+    
+    for day, files in sorted(daily.items()):
+        if day not in compacted_days:
+            tables.extend(pq.read_table(f, columns=read_names) for f in files)
+    
+    schema = pa.schema([schema.field(column) for column in names])
+    tables = [t.select(names).cast(schema) for t in tables]
+    return to_frame(pa.concat_tables(tables) if tables else schema.empty_table())
+
+
+def month_bounds(month_start: str) -> tuple:
+    """('2024-01-01') -> ('2024-01-01', '2024-01-31')"""
+    start = date.fromisoformat(month_start)
+    end = (pd.Timestamp(start) + pd.offsets.MonthEnd(0)).date()
+    return start.isoformat(), end.isoformat()
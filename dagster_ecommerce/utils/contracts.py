@@ -0,0 +1,71 @@
+"""Write and read asset files under their declared schemas (schemas.ASSET_SCHEMAS)"""
+import os
+from pathlib import Path
+from typing import Iterable, Union
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from ..schemas import ASSET_SCHEMAS
+
+
+class SchemaDriftError(ValueError):
+    """Data does not fit its asset's declared schema"""
+
+
+def contract(asset: str) -> pa.Schema:
+    return ASSET_SCHEMAS[asset]
+
+
+def conform(data: Union[pd.DataFrame, pa.Table], asset: str) -> pa.Table:
+    """
+    Cast data to the asset's schema, column by column
+    Strings are parsed (timestamps), labels dictionary-encoded; missing or
+    undeclared columns and failed casts raise SchemaDriftError
+    """
+    schema = contract(asset)
+    table = pa.Table.from_pandas(data, preserve_index=False) if isinstance(data, pd.DataFrame) else data
+
+    missing = [name for name in schema.names if name not in table.column_names]
+    extra = [name for name in table.column_names if name not in schema.names]
+    if missing or extra:
+        raise SchemaDriftError(f"{asset}: missing columns {missing}, undeclared columns {extra}")
+
+    columns = []
+    for field in schema:
+        column = table[field.name]
+        if column.type != field.type:
+            try:
+                column = column.cast(field.type)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                raise SchemaDriftError(
+                    f"{asset}.{field.name}: {column.type} does not cast to {field.type} ({e})"
+                ) from e
+        columns.append(column)
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def to_frame(table: pa.Table) -> pd.DataFrame:
+    """Typed DataFrame: timestamps as datetime64, labels as categoricals"""
+    return table.unify_dictionaries().to_pandas()
+
+
+def write_contract(data: Union[pd.DataFrame, pa.Table], asset: str, path: Union[str, Path]) -> pa.Table:
+    """Conform and write atomically; returns the written table"""
+    table = conform(data, asset)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".parquet.tmp")
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+    return table
+
+
+def read_contract(paths: Iterable[Union[str, Path]], asset: str) -> pd.DataFrame:
+    """
+    Read files written under the asset's contract, as one typed DataFrame
+    Nothing is re-inferred; files from before a contract change are cast
+    """
+    tables = [conform(pq.read_table(p), asset) for p in paths]
+    if not tables:
+        return to_frame(contract(asset).empty_table())
+    return to_frame(pa.concat_tables(tables))
@@ -0,0 +1,92 @@
+"""Memory-mapped customer_id lookup index over the CLV table"""
+import os
+import tempfile
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_INDEX_PATH = "data/processed/customer_metrics/clv_index.npy"
+
+# Fixed-width records, sorted by customer_id
+INDEX_DTYPE = np.dtype([
+    ("customer_id", "<i8"),
+    ("lifetime_value", "<f8"),
+    ("recency_score", "i1"),
+    ("frequency_score", "i1"),
+    ("monetary_score", "i1"),
+    ("rfm_score", "i1"),
+    ("rfm_segment", "S16"),
+])
+
+
+def write_customer_index(df: pd.DataFrame, path: str = DEFAULT_INDEX_PATH) -> int:
+    """
+    Build the index from a CLV DataFrame
+    Written to a temp file and renamed into place, so readers
+    only ever see a complete index
+    """
+    records = np.empty(len(df), dtype=INDEX_DTYPE)
+    for name in INDEX_DTYPE.names:
+        values = df[name].to_numpy()
+        if name == "rfm_segment":
+            values = values.astype(str).astype("S16")
+        records[name] = values
+    records.sort(order="customer_id", kind="stable")
+
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, records)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file 0600; serving processes must read it
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return len(records)
+
+
+class CustomerIndex:
+    """
+    Read-only lookups by customer_id
+    The file is memory-mapped, so opening it does not parse or load the data
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        self._records = np.load(path, mmap_mode="r")
+        self._keys = self._records["customer_id"]
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def get(self, customer_id: int) -> Optional[Dict]:
+        """Return the CLV record for customer_id, or None"""
+        # bisect touches ~log2(n) keys; np.searchsorted would first copy
+        # the strided key column out of the mapping
+        pos = bisect_left(self._keys, customer_id)
+        if pos == len(self._keys) or self._keys[pos] != customer_id:
+            return None
+        record = self._records[pos]
+        return {
+            "customer_id": int(record["customer_id"]),
+            "lifetime_value": float(record["lifetime_value"]),
+            "recency_score": int(record["recency_score"]),
+            "frequency_score": int(record["frequency_score"]),
+            "monetary_score": int(record["monetary_score"]),
+            "rfm_score": int(record["rfm_score"]),
+            "rfm_segment": record["rfm_segment"].decode(),
+        }
+
+    def reload(self) -> "CustomerIndex":
+        """Pick up a newly published index"""
+        self.__init__(self.path)
+        return self
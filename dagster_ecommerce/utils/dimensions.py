@@ -0,0 +1,134 @@
+"""Versioned, array-indexed dimension tables for fact-side lookups"""
+import hashlib
+from pathlib import Path
+from typing import Dict, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+
+DIMENSION_ROOT = "data/processed/dimensions"
+
+# Dense arrays are used while max key <= DENSE_FACTOR * rows (+ slack),
+# sparse key spaces fall back to a sorted-key search
+DENSE_FACTOR = 8
+DENSE_SLACK = 1024
+
+# Built dimensions of this process, by name and version
+_CACHE: Dict[Tuple[str, str], "Dimension"] = {}
+
+
+def dimension_version(df: pd.DataFrame, key: str, attributes: Sequence[str]) -> str:
+    """Content hash of the key and attribute columns, independent of row order"""
+    columns = [key, *attributes]
+    rows = df[columns].sort_values(key, kind="stable")
+    digest = hashlib.sha1(pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes())
+    digest.update(",".join(columns).encode())
+    return digest.hexdigest()[:16]
+
+
+def _is_dense(keys: np.ndarray) -> bool:
+    return len(keys) == 0 or keys[-1] <= DENSE_FACTOR * len(keys) + DENSE_SLACK
+
+
+class Dimension:
+    """
+    Attribute lookup by integer key without a hash join
+    - Each attribute is dictionary-encoded: codes[key] -> values[code]
+    - Codes live in a dense array indexed by the key itself
+    """
+
+    def __init__(self, version: str, keys: np.ndarray, codes: Dict[str, np.ndarray], values: Dict[str, np.ndarray]):
+        self.version = version
+        self.keys = keys
+        self.codes = codes
+        self.values = values
+        self.dense = _is_dense(keys)
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, key: str, attributes: Sequence[str], version: str) -> "Dimension":
+        df = df.drop_duplicates(subset=[key], keep="last").sort_values(key)
+        keys = df[key].to_numpy(dtype=np.int64)
+        codes, values = {}, {}
+        for attribute in attributes:
+            row_codes, uniques = pd.factorize(df[attribute])
+            if _is_dense(keys):
+                # -1 marks keys missing from the catalog
+                table = np.full(int(keys[-1]) + 1 if len(keys) else 0, -1, dtype=np.int32)
+                table[keys] = row_codes
+            else:
+                table = row_codes.astype(np.int32)
+            codes[attribute] = table
+            values[attribute] = np.asarray(uniques, dtype=object)
+        return cls(version, keys, codes, values)
+
+    def positions(self, keys) -> Tuple[np.ndarray, np.ndarray]:
+        """Array slot for each key and whether the key is in range"""
+        keys = np.asarray(keys, dtype=np.int64)
+        if self.dense:
+            size = int(self.keys[-1]) + 1 if len(self.keys) else 0
+            known = (keys >= 0) & (keys < size)
+            return np.where(known, keys, 0), known
+        slots = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return slots, self.keys[slots] == keys
+
+    def lookup(self, attribute: str, keys) -> Tuple[np.ndarray, np.ndarray]:
+        """Attribute values for keys (None where unknown) and the known mask"""
+        slots, known = self.positions(keys)
+        values = self.values[attribute]
+        if not len(values):
+            return np.full(len(slots), None, dtype=object), np.zeros(len(slots), dtype=bool)
+        codes = self.codes[attribute][slots]
+        known = known & (codes >= 0)
+        return np.where(known, values[np.maximum(codes, 0)], None), known
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {"keys": self.keys}
+        for attribute in self.codes:
+            arrays[f"codes:{attribute}"] = self.codes[attribute]
+            arrays[f"values:{attribute}"] = self.values[attribute].astype(str)
+        tmp_path = path.with_suffix(".tmp.npz")
+        np.savez(tmp_path, **arrays)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path, version: str) -> "Dimension":
+        with np.load(path, allow_pickle=False) as data:
+            attributes = [name[len("codes:"):] for name in data.files if name.startswith("codes:")]
+            return cls(
+                version,
+                data["keys"],
+                {a: data[f"codes:{a}"] for a in attributes},
+                {a: data[f"values:{a}"].astype(object) for a in attributes}
+            )
+
+
+def load_dimension(
+    name: str,
+    df: pd.DataFrame,
+    key: str,
+    attributes: Sequence[str],
+    root: str = DIMENSION_ROOT
+) -> Dimension:
+    """
+    Dimension for this version of df, built at most once per version
+    Looked up in-process first, then on disk, then built and saved
+    """
+    version = dimension_version(df, key, attributes)
+    cached = _CACHE.get((name, version))
+    if cached is not None:
+        return cached
+
+    path = Path(root) / name / f"version={version}.npz"
+    if path.exists():
+        dimension = Dimension.load(path, version)
+    else:
+        dimension = Dimension.build(df, key, attributes, version)
+        dimension.save(path)
+    _CACHE[(name, version)] = dimension
+    return dimension
+
+
+def product_dimension(raw_products: pd.DataFrame, root: str = DIMENSION_ROOT) -> Dimension:
+    """Products keyed by FakeStore id, with title and category"""
+    return load_dimension("products", raw_products, "id", ["title", "category"], root)
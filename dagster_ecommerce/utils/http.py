@@ -0,0 +1,409 @@
+"""Latency-aware HTTP GET: hedging, jittered retries, Retry-After, circuit breaking"""
+import bisect
+import heapq
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+import requests
+
+if TYPE_CHECKING:
+    from .ratelimit import SharedTokenBucket
+
+
+# Bucket upper bounds in seconds; the last bucket is open-ended
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+
+# Hedge delay until an endpoint has enough samples for a percentile
+DEFAULT_HEDGE_DELAY = 1.0
+MIN_HEDGE_SAMPLES = 20
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised without calling the endpoint while its circuit is open"""
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with interpolated percentiles"""
+
+    def __init__(self, buckets: List[float] = LATENCY_BUCKETS):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate latency at rank q, None before any sample"""
+        if not self.total:
+            return None
+        rank = q * self.total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1] * 2
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def to_dict(self) -> Dict:
+        """JSON-friendly summary, for asset metadata"""
+        labels = [f"<={b}s" for b in self.buckets] + [f">{self.buckets[-1]}s"]
+        return {
+            "count": self.total,
+            "mean_s": round(self.sum / self.total, 4) if self.total else None,
+            "p50_s": self.quantile(0.5),
+            "p95_s": self.quantile(0.95),
+            "p99_s": self.quantile(0.99),
+            "buckets": {label: c for label, c in zip(labels, self.counts) if c}
+        }
+
+
+class CircuitBreaker:
+    """
+    closed -> open after failure_threshold consecutive failures
+    open -> half-open after reset_seconds; one probe decides which way it goes
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def cancel_probe(self) -> None:
+        """The probe allow() let through was never sent"""
+        self.probing = False
+
+    def record(self, success: bool) -> None:
+        self.probing = False
+        if success:
+            self.failures = 0
+            self.opened_at = None
+            return
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class EndpointStats:
+    """Histogram + breaker for one endpoint (scheme://host/path)"""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.lock = threading.Lock()
+        self.latency = LatencyHistogram()
+        self.breaker = CircuitBreaker(failure_threshold, reset_seconds)
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.retries = 0
+        self.limiter: Optional["SharedTokenBucket"] = None
+        self.rate_limited_seconds = 0.0
+
+
+_ENDPOINTS: Dict[str, EndpointStats] = {}
+_REGISTRY_LOCK = threading.Lock()
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_SESSION: Optional[requests.Session] = None
+
+# Responses shared by every caller inside shared_responses(), by URL + params.
+# Per context, so concurrent blocks (e.g. two runs in one process) never share;
+# threads working for a block run in a copy of its context
+_SHARED: ContextVar[Optional[Dict[tuple, Future]]] = ContextVar("shared_responses", default=None)
+
+
+def endpoint_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}{parts.path}"
+
+
+def endpoint(url: str, failure_threshold: int = 5, reset_seconds: float = 30.0) -> EndpointStats:
+    """Process-wide stats for url's endpoint"""
+    key = endpoint_key(url)
+    with _REGISTRY_LOCK:
+        if key not in _ENDPOINTS:
+            _ENDPOINTS[key] = EndpointStats(failure_threshold, reset_seconds)
+        return _ENDPOINTS[key]
+
+
+def endpoint_stats() -> Dict[str, Dict]:
+    """Latency histograms, breaker state and hedge counts per endpoint"""
+    with _REGISTRY_LOCK:
+        items = list(_ENDPOINTS.items())
+    stats = {}
+    for key, ep in items:
+        with ep.lock:
+            stats[key] = {
+                **ep.latency.to_dict(),
+                "circuit": ep.breaker.state,
+                "hedges": ep.hedges,
+                "hedge_wins": ep.hedge_wins,
+                "retries": ep.retries
+            }
+            limiter = ep.limiter
+            stats[key]["rate_limited_s"] = round(ep.rate_limited_seconds, 3)
+        if limiter is not None:
+            stats[key]["rate_limit"] = limiter.state()
+    return stats
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _REGISTRY_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="http")
+        return _EXECUTOR
+
+
+def session() -> requests.Session:
+    """Process-wide session: keep-alive connections reused across calls and threads"""
+    global _SESSION
+    with _REGISTRY_LOCK:
+        if _SESSION is None:
+            _SESSION = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=16)
+            _SESSION.mount("https://", adapter)
+            _SESSION.mount("http://", adapter)
+        return _SESSION
+
+
+@contextmanager
+def shared_responses() -> Iterator[None]:
+    """
+    Within the block, identical GETs are sent once: concurrent callers
+    wait for the first one and get its response
+    Threads only share it when they run in a copy of the block's context,
+    e.g. executor.submit(contextvars.copy_context().run, fn)
+    """
+    if _SHARED.get() is not None:
+        yield
+        return
+    token = _SHARED.set({})
+    try:
+        yield
+    finally:
+        _SHARED.reset(token)
+
+
+def _shared_future(key: tuple):
+    """(future, is_owner) for key, or (None, True) outside shared_responses()"""
+    shared = _SHARED.get()
+    if shared is None:
+        return None, True
+    with _REGISTRY_LOCK:
+        if key in shared:
+            return shared[key], False
+        future = shared[key] = Future()
+        return future, True
+
+
+def retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """Retry-After as seconds (delta-seconds or HTTP date), None if absent"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full jitter: uniform in [0, min(cap, base * 2**attempt)]"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def hedged_get(
+    url: str,
+    params: Optional[Dict] = None,
+    timeout: float = 30,
+    max_retries: int = 3,
+    hedge: bool = True,
+    hedge_quantile: float = 0.95,
+    backoff_base: float = 0.5,
+    backoff_cap: float = 10.0,
+    failure_threshold: int = 5,
+    reset_seconds: float = 30.0,
+    limiter: Optional["SharedTokenBucket"] = None,
+    limiter_max_wait: Optional[float] = 300.0,
+    get: Optional[Callable[..., requests.Response]] = None
+) -> requests.Response:
+    """
+    GET with tail-latency controls
+    - Hedge: if no response after the endpoint's p95 latency, a duplicate
+      request is sent and the first good response wins
+    - Retries of retryable failures (connection errors, 429, 5xx) wait a
+      full-jitter backoff, or Retry-After when given, as timers: other
+      in-flight attempts keep running meanwhile
+    - While the endpoint's circuit is open, fails fast with CircuitOpenError
+    - With a limiter, every attempt (hedges included) takes a token first,
+      waiting up to limiter_max_wait (Retry-After pauses included), and
+      reports its outcome so the shared rate adapts
+    - Inside shared_responses(), a GET already sent or in flight is not repeated
+    """
+    shared, owner = _shared_future((url, tuple(sorted((params or {}).items()))))
+    if not owner:
+        return shared.result()
+    try:
+        response = _hedged_get(
+            url, params, timeout, max_retries, hedge, hedge_quantile, backoff_base,
+            backoff_cap, failure_threshold, reset_seconds, limiter, limiter_max_wait,
+            get or session().get
+        )
+    except BaseException as e:
+        if shared is not None:
+            shared.set_exception(e)
+        raise
+    if shared is not None:
+        shared.set_result(response)
+    return response
+
+
+def _hedged_get(
+    url, params, timeout, max_retries, hedge, hedge_quantile, backoff_base,
+    backoff_cap, failure_threshold, reset_seconds, limiter, limiter_max_wait, get
+) -> requests.Response:
+    ep = endpoint(url, failure_threshold, reset_seconds)
+    ep.limiter = limiter
+    executor = _executor()
+    # When each attempt went out, i.e. had its token (monotonic)
+    sent: List[float] = []
+
+    def attempt() -> requests.Response:
+        with ep.lock:
+            allowed = ep.breaker.allow()
+        if not allowed:
+            raise CircuitOpenError(f"Circuit open for {endpoint_key(url)}")
+        if limiter is not None:
+            try:
+                waited = limiter.acquire(timeout=limiter_max_wait)
+            except BaseException:
+                # Nothing was sent: a half-open breaker must not stay probing
+                with ep.lock:
+                    ep.breaker.cancel_probe()
+                raise
+            with ep.lock:
+                ep.rate_limited_seconds += waited
+        sent.append(time.monotonic())
+        started = time.perf_counter()
+        try:
+            response = get(url, params=params, timeout=timeout)
+        except requests.exceptions.RequestException:
+            with ep.lock:
+                ep.breaker.record(False)
+            if limiter is not None:
+                limiter.feedback(0, time.perf_counter() - started)
+            raise
+        latency = time.perf_counter() - started
+        with ep.lock:
+            ep.latency.observe(latency)
+            ep.breaker.record(response.status_code < 500)
+        if limiter is not None:
+            limiter.feedback(
+                response.status_code,
+                latency,
+                retry_after_seconds(response) if response.status_code == 429 else None
+            )
+        return response
+
+    with ep.lock:
+        p = ep.latency.quantile(hedge_quantile)
+        hedge_delay = p if p is not None and ep.latency.total >= MIN_HEDGE_SAMPLES else DEFAULT_HEDGE_DELAY
+
+    now = time.monotonic()
+    pending: Dict[Future, bool] = {executor.submit(attempt): False}  # future -> is hedge
+    timers: List = []  # (due, kind) heap; kind is "hedge" or "retry"
+    if hedge:
+        heapq.heappush(timers, (now + hedge_delay, "hedge"))
+    retries_left = max_retries - 1
+    last_error: Optional[BaseException] = None
+
+    while pending or timers:
+        timeout_s = max(timers[0][0] - time.monotonic(), 0) if timers else None
+        done, _ = wait(list(pending), timeout=timeout_s, return_when=FIRST_COMPLETED) if pending else (set(), None)
+
+        for future in done:
+            is_hedge = pending.pop(future)
+            try:
+                response = future.result()
+            except CircuitOpenError:
+                raise
+            except requests.exceptions.RequestException as e:
+                last_error, delay = e, None
+            else:
+                if response.status_code not in RETRYABLE_STATUS:
+                    if is_hedge:
+                        with ep.lock:
+                            ep.hedge_wins += 1
+                    response.raise_for_status()
+                    return response
+                last_error = requests.exceptions.HTTPError(
+                    f"{response.status_code} for {url}", response=response
+                )
+                delay = retry_after_seconds(response)
+            if retries_left > 0:
+                retries_left -= 1
+                if delay is None:
+                    delay = backoff_delay(max_retries - 2 - retries_left, backoff_base, backoff_cap)
+                heapq.heappush(timers, (time.monotonic() + delay, "retry"))
+                with ep.lock:
+                    ep.retries += 1
+
+        # Fire timers that are due
+        while timers and timers[0][0] <= time.monotonic():
+            _, kind = heapq.heappop(timers)
+            if kind == "hedge":
+                with ep.lock:
+                    # Nothing to hedge once the primary failed (its retry covers
+                    # it), and no duplicates while the endpoint is recovering
+                    if not pending or ep.breaker.state != "closed":
+                        continue
+                # The delay runs from when the primary went out: one still
+                # waiting for a token is not slow, and a hedge would take another
+                due = sent[0] + hedge_delay if sent else time.monotonic() + hedge_delay
+                if due > time.monotonic():
+                    heapq.heappush(timers, (due, "hedge"))
+                    continue
+                with ep.lock:
+                    ep.hedges += 1
+                pending[executor.submit(attempt)] = True
+            else:
+                pending[executor.submit(attempt)] = False
+
+        if not pending and not timers:
+            break
+
+    raise last_error if last_error is not None else requests.exceptions.RequestException(url)
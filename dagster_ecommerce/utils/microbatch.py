@@ -0,0 +1,82 @@
+"""Append-only part files and watermarks for micro-batched partitions"""
+from __future__ import annotations
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List
+from dagster import Config
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+WATERMARK_NAME = "_watermark.json"
+PART_PREFIX = "part-"
+
+
+class MicroBatchConfig(Config):
+    """
+    append=True adds only new rows to the partition, as a part file,
+    instead of rewriting it
+    """
+
+    append: bool = False
+
+
+def read_watermark(partition_dir: str) -> Dict:
+    """Progress recorded by the last write to a partition directory"""
+    path = Path(partition_dir) / WATERMARK_NAME
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def write_watermark(partition_dir: str, **values) -> Dict:
+    """Merge values into the partition's watermark, atomically"""
+    path = Path(partition_dir) / WATERMARK_NAME
+    path.parent.mkdir(parents=True, exist_ok=True)
+    watermark = {**read_watermark(partition_dir), **values}
+    tmp_path = path.with_suffix(".json.tmp")
+    tmp_path.write_text(json.dumps(watermark, default=str))
+    os.replace(tmp_path, path)
+    return watermark
+
+
+def part_files(partition_dir: str) -> List[Path]:
+    """Appended part files, oldest first"""
+    return sorted(Path(partition_dir).glob(f"{PART_PREFIX}*.parquet"))
+
+
+def append_part(df: pd.DataFrame, partition_dir: str, asset: str) -> Path:
+    """
+    Write df as the next part file, under the asset's schema contract;
+    readers never see a partial file
+    """
+    from .contracts import write_contract
+    
+    existing = part_files(partition_dir)
+    number = int(existing[-1].stem[len(PART_PREFIX):]) + 1 if existing else 0
+    path = Path(partition_dir) / f"{PART_PREFIX}{number:05d}.parquet"
+    write_contract(df, asset, path)
+    return path
+
+
+def clear_parts(partition_dir: str) -> int:
+    """Remove part files before the partition is rewritten in full"""
+    files = part_files(partition_dir)
+    for path in files:
+        path.unlink()
+    return len(files)
+
+
+def read_partition(partition_dir: str, asset: str) -> pd.DataFrame:
+    """
+    Base file plus all appended parts of a partition directory, as one
+    table under the asset's schema contract
+    """
+    from .contracts import read_contract
+    
+    files = sorted(
+        p for p in Path(partition_dir).glob("*.parquet") if not p.name.startswith("_")
+    )
+    return read_contract(files, asset)
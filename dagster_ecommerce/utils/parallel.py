@@ -0,0 +1,129 @@
+"""Chunked process-pool execution for large DataFrames"""
+from __future__ import annotations
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import TYPE_CHECKING, Callable, List, Tuple
+from dagster import Config
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class ParallelConfig(Config):
+    """
+    Intra-asset parallelism
+    num_workers=1 keeps the single-process path
+    """
+
+    num_workers: int = 1
+    chunk_size: int = 250_000
+
+
+def _write_shared(df: pd.DataFrame) -> Tuple[shared_memory.SharedMemory, int]:
+    """Serialize a DataFrame as an Arrow IPC stream into a new shared memory block"""
+    import pyarrow as pa
+    
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    # Measure first so the stream is written straight into shared memory
+    mock = pa.MockOutputStream()
+    with pa.ipc.new_stream(mock, table.schema) as writer:
+        writer.write_table(table)
+    size = mock.size()
+
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    sink = pa.FixedSizeBufferWriter(pa.py_buffer(shm.buf))
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    sink.close()
+    return shm, size
+
+
+def _read_shared(name: str, size: int, unlink: bool) -> pd.DataFrame:
+    """Load a DataFrame from a shared memory block written by _write_shared"""
+    import pyarrow as pa
+    
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        table = pa.ipc.open_stream(pa.py_buffer(shm.buf[:size])).read_all()
+        # Copy out of the block so it can be released right away
+        df = table.to_pandas(split_blocks=False, self_destruct=False)
+        del table
+    finally:
+        shm.close()
+        if unlink:
+            shm.unlink()
+    return df
+
+
+def _release(name: str) -> None:
+    """Unlink a block if it still exists"""
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
+
+
+def _run_chunk(fn: Callable, name: str, size: int) -> Tuple[str, int]:
+    """Worker entry point: read chunk, apply fn, write result back"""
+    result = fn(_read_shared(name, size, unlink=False))
+    out, out_size = _write_shared(result)
+    # Pool workers share the parent's resource tracker, so the
+    # parent can take over the block and unlink it after reading
+    out.close()
+    return out.name, out_size
+
+
+def split_chunks(df: pd.DataFrame, chunk_size: int) -> List[pd.DataFrame]:
+    """Split a DataFrame into contiguous row chunks"""
+    return [
+        df.iloc[start:start + chunk_size]
+        for start in range(0, len(df), chunk_size)
+    ]
+
+
+def run_chunked(
+    df: pd.DataFrame,
+    fn: Callable[[pd.DataFrame], pd.DataFrame],
+    num_workers: int = 1,
+    chunk_size: int = 250_000
+) -> pd.DataFrame:
+    """
+    Apply a row-local transform to df in a process pool
+    - fn must be a module-level function (or functools.partial of one)
+    - Chunks travel as Arrow buffers in shared memory, not pickled DataFrames
+    - Results are stitched back in input order
+    - POSIX only: on Windows the blocks die with their last handle,
+      so the single-process path is used there
+    """
+    if num_workers <= 1 or len(df) <= chunk_size or os.name == "nt":
+        return fn(df)
+
+    import pandas as pd
+    
+    inputs = [_write_shared(chunk) for chunk in split_chunks(df, chunk_size)]
+    outputs = []
+    try:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            futures = [
+                executor.submit(_run_chunk, fn, shm.name, size)
+                for shm, size in inputs
+            ]
+        # The pool has shut down, so every future is done: take the blocks
+        # of the chunks that succeeded before raising for one that failed
+        outputs = [future.result() for future in futures if future.exception() is None]
+        for future in futures:
+            if future.exception() is not None:
+                raise future.exception()
+        results = [_read_shared(name, size, unlink=False) for name, size in outputs]
+    finally:
+        for shm, _ in inputs:
+            shm.close()
+            shm.unlink()
+        for name, _ in outputs:
+            _release(name)
+    
+    return pd.concat(results, ignore_index=True)
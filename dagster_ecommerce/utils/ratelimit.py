@@ -0,0 +1,182 @@
+"""Token bucket shared by every process on the host, with AIMD rate adaptation"""
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+import requests
+
+
+def default_db_path() -> str:
+    """
+    $RATE_LIMIT_DB, else rate_limits.sqlite under $DATA_ROOT
+    Under the data root itself, not a sample's: the limit is the host's
+    """
+    return os.getenv("RATE_LIMIT_DB") or f"{os.getenv('DATA_ROOT', 'data')}/rate_limits.sqlite"
+
+
+# How long an attempt may wait for a token, Retry-After pauses included;
+# separate from the HTTP timeout
+DEFAULT_MAX_WAIT = 300.0
+
+# AIMD: the rate may float between these multiples of the configured rate
+MIN_RATE_FACTOR = 0.1
+MAX_RATE_FACTOR = 4.0
+DECREASE_FACTOR = 0.5   # on 429
+SLOW_FACTOR = 0.9       # on a response slower than latency_target
+INCREASE_PER_SECOND = 0.05  # of the configured rate, per second of successes
+DECREASE_COOLDOWN = 1.0     # one decrease per second, however many 429s land
+
+
+class RateLimitWaitExceeded(requests.exceptions.Timeout):
+    """No token within the wait budget; a RequestException, so it is retried"""
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    key TEXT PRIMARY KEY,
+    configured REAL NOT NULL,
+    rate REAL NOT NULL,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    last_decrease REAL NOT NULL
+)
+"""
+
+
+class SharedTokenBucket:
+    """
+    Token bucket whose state lives in SQLite
+    - Every acquire/feedback is one BEGIN IMMEDIATE transaction, so
+      concurrent runs on the host draw from the same bucket
+    - The rate adapts: halved on 429 (with Retry-After pausing every
+      process), nudged down on slow responses, raised slowly on success
+    """
+
+    def __init__(
+        self,
+        key: str,
+        rate: float,
+        burst: Optional[float] = None,
+        latency_target: float = 2.0,
+        db_path: Optional[str] = None
+    ):
+        db_path = db_path or default_db_path()
+        self.key = key
+        self.configured = rate
+        self.burst = burst or max(rate, 1.0)
+        self.latency_target = latency_target
+        # Absolute, so a later chdir does not point the bucket at a new file
+        self.db_path = str(Path(db_path).resolve())
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def _transaction(self, update):
+        """Run update(state) on the refilled bucket, atomically across processes"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            row = conn.execute(
+                "SELECT configured, rate, tokens, updated, last_decrease FROM buckets WHERE key = ?",
+                (self.key,)
+            ).fetchone()
+            if row is None or row[0] != self.configured:
+                # New bucket, or the configured rate changed: start over
+                row = (self.configured, self.configured, self.burst, now, 0.0)
+            configured, rate, tokens, updated, last_decrease = row
+            tokens = min(self.burst, tokens + max(now - updated, 0) * rate)
+            state = {"rate": rate, "tokens": tokens, "last_decrease": last_decrease, "now": now}
+            result = update(state)
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?, ?, ?)",
+                (self.key, configured, state["rate"], state["tokens"], now, state["last_decrease"])
+            )
+            conn.execute("COMMIT")
+            return result
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def acquire(self, timeout: Optional[float] = DEFAULT_MAX_WAIT) -> float:
+        """
+        Take one token, sleeping (outside any lock) until there is one
+        Returns seconds waited; raises RateLimitWaitExceeded when the wait
+        would outlast timeout, the wait budget (None: no limit)
+        """
+        started = time.monotonic()
+
+        def take(state):
+            if state["tokens"] >= 1:
+                state["tokens"] -= 1
+                return 0.0
+            return (1 - state["tokens"]) / state["rate"]
+
+        while True:
+            wait = self._transaction(take)
+            if wait == 0.0:
+                return time.monotonic() - started
+            if timeout is not None and time.monotonic() - started + wait > timeout:
+                raise RateLimitWaitExceeded(
+                    f"Rate limit for {self.key}: no token within {timeout}s (next in {wait:.1f}s)"
+                )
+            time.sleep(wait)
+
+    def feedback(self, status_code: int, latency: float, retry_after: Optional[float] = None) -> float:
+        """
+        Adapt the shared rate to a response (status_code 0: no response)
+        Returns the new rate
+        """
+        low = self.configured * MIN_RATE_FACTOR
+        high = self.configured * MAX_RATE_FACTOR
+
+        def adapt(state):
+            rate = state["rate"]
+            throttled = status_code == 429
+            slow = latency > self.latency_target
+            if throttled or slow:
+                if state["now"] - state["last_decrease"] >= DECREASE_COOLDOWN:
+                    rate *= DECREASE_FACTOR if throttled else SLOW_FACTOR
+                    state["last_decrease"] = state["now"]
+            elif 0 < status_code < 500:
+                # About INCREASE_PER_SECOND x configured per second at the current rate
+                rate += self.configured * INCREASE_PER_SECOND / max(rate, 1e-9)
+            state["rate"] = min(max(rate, low), high)
+            if throttled and retry_after:
+                # Everyone waits out Retry-After
+                state["tokens"] = min(state["tokens"], -retry_after * state["rate"])
+            return state["rate"]
+
+        return self._transaction(adapt)
+
+    def state(self) -> Dict:
+        """Current shared rate and tokens"""
+        return self._transaction(
+            lambda state: {"rate": round(state["rate"], 3), "tokens": round(state["tokens"], 3)}
+        )
+
+
+_BUCKETS: Dict[tuple, SharedTokenBucket] = {}
+_BUCKETS_LOCK = threading.Lock()
+
+
+def shared_bucket(key: str, rate: float, db_path: Optional[str] = None, **kwargs) -> SharedTokenBucket:
+    """One bucket object per (db, key, rate) in this process"""
+    db_path = db_path or default_db_path()
+    with _BUCKETS_LOCK:
+        cache_key = (db_path, key, rate)
+        if cache_key not in _BUCKETS:
+            _BUCKETS[cache_key] = SharedTokenBucket(key, rate, db_path=db_path, **kwargs)
+        return _BUCKETS[cache_key]
@@ -0,0 +1,169 @@
+"""Week / month / year x category rollups maintained from daily sales sidecars"""
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List
+import numpy as np
+import pandas as pd
+from .contracts import read_contract, write_contract
+from .sketches import HyperLogLog
+
+
+DAILY_SALES_ROOT = "data/processed/daily_sales"
+ROLLUP_ROOT = "data/processed/rollups"
+
+# Written next to each daily sales.parquet: additive sums + customer sketch
+SIDECAR_NAME = "_rollup.parquet"
+
+HLL_PRECISION = 12
+GRAINS = ("week", "month", "year")
+SUM_COLUMNS = ["num_orders", "total_revenue", "total_quantity"]
+
+
+def daily_sidecar(sums: pd.DataFrame, customers: pd.DataFrame) -> pd.DataFrame:
+    """Per (date, category) sums with a HyperLogLog of its customers"""
+    sketches = {
+        key: HyperLogLog(HLL_PRECISION).update(group["customer_id"].to_numpy()).to_bytes()
+        for key, group in customers.groupby(["date", "category"])
+    }
+    sidecar = sums[["date", "category", *SUM_COLUMNS]].copy()
+    sidecar["customers_hll"] = [
+        sketches.get(key, HyperLogLog(HLL_PRECISION).to_bytes())
+        for key in zip(sidecar["date"], sidecar["category"])
+    ]
+    return sidecar
+
+
+def period_start(dates: pd.Series, grain: str) -> pd.Series:
+    """First day of the week (Monday), month or year containing each (timestamp) date"""
+    dates = dates.dt.normalize()
+    if grain == "week":
+        return dates - pd.to_timedelta(dates.dt.weekday, unit="D")
+    if grain == "month":
+        return dates - pd.to_timedelta(dates.dt.day - 1, unit="D")
+    return dates - pd.to_timedelta(dates.dt.dayofyear - 1, unit="D")
+
+
+def daily_fingerprints(daily_root: str = DAILY_SALES_ROOT) -> Dict[str, str]:
+    """date -> fingerprint of that day's sidecar files (size + mtime)"""
+    fingerprints = {}
+    for date_dir in sorted(Path(daily_root).glob("date=*")):
+        files = sorted(date_dir.rglob(SIDECAR_NAME))
+        if not files:
+            continue
+        digest = hashlib.sha1()
+        for f in files:
+            stat = f.stat()
+            digest.update(f"{f.relative_to(date_dir)}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        fingerprints[date_dir.name[len("date="):]] = digest.hexdigest()
+    return fingerprints
+
+
+def read_days(days: Iterable[str], daily_root: str = DAILY_SALES_ROOT) -> pd.DataFrame:
+    """Sidecars of the given days (all hour/category sub-partitions)"""
+    files = [
+        f
+        for day in sorted(days)
+        for f in sorted((Path(daily_root) / f"date={day}").rglob(SIDECAR_NAME))
+    ]
+    return read_contract(files, "daily_sales_rollup")
+
+
+def merge_rows(df: pd.DataFrame, by: List[str]) -> pd.DataFrame:
+    """Sum the additive columns and merge the sketches within each group"""
+    rows = []
+    for key, group in df.groupby(by, sort=True, observed=True):
+        registers = np.max(
+            np.stack([np.frombuffer(b, dtype=np.uint8) for b in group["customers_hll"]]),
+            axis=0
+        )
+        sketch = HyperLogLog.from_bytes(registers.tobytes())
+        rows.append({
+            **dict(zip(by, key)),
+            **{c: group[c].sum() for c in SUM_COLUMNS},
+            "unique_customers": sketch.count(),
+            "customers_hll": sketch.to_bytes()
+        })
+    return pd.DataFrame(rows, columns=[*by, *SUM_COLUMNS, "unique_customers", "customers_hll"])
+
+
+def finalize(rollup: pd.DataFrame) -> pd.DataFrame:
+    """Dashboard view of a rollup, without the sketches"""
+    df = rollup.drop(columns=["customers_hll"])
+    df["avg_order_value"] = df["total_revenue"] / df["num_orders"]
+    df["revenue_per_customer"] = df["total_revenue"] / df["unique_customers"].clip(lower=1)
+    return df
+
+
+def rollup_path(grain: str, root: str = ROLLUP_ROOT) -> Path:
+    return Path(root) / f"{grain}.parquet"
+
+
+def read_rollup(grain: str, root: str = ROLLUP_ROOT) -> pd.DataFrame:
+    """Stored rollup for a grain, sketches included"""
+    path = rollup_path(grain, root)
+    return read_contract([path] if path.exists() else [], "sales_rollups")
+
+
+def _replace_periods(grain: str, periods: set, fresh: pd.DataFrame, root: str) -> pd.DataFrame:
+    """Swap the rows of the given periods for freshly computed ones"""
+    stored = read_rollup(grain, root)
+    kept = stored[~stored["period_start"].isin(list(periods))]
+    rollup = pd.concat([kept, fresh], ignore_index=True) if len(kept) else fresh
+    rollup = rollup.sort_values(["period_start", "category"], ignore_index=True)
+    write_contract(rollup, "sales_rollups", rollup_path(grain, root))
+    return rollup
+
+
+def update_rollups(
+    daily_root: str = DAILY_SALES_ROOT,
+    root: str = ROLLUP_ROOT,
+    full_rebuild: bool = False
+) -> Dict:
+    """
+    Bring the rollups up to date with the daily sidecars
+    - Days whose sidecars changed (or vanished) since the last run are found
+      from file fingerprints, without reading any data
+    - Weeks and months containing them are recomputed from their days,
+      years from their (already updated) months
+    """
+    state_path = Path(root) / "_state.json"
+    state = {} if full_rebuild or not state_path.exists() else json.loads(state_path.read_text())
+    previous = state.get("days", {})
+    current = daily_fingerprints(daily_root)
+
+    changed = sorted(
+        day for day in set(current) | set(previous)
+        if current.get(day) != previous.get(day)
+    )
+    if full_rebuild:
+        for grain in GRAINS:
+            rollup_path(grain, root).unlink(missing_ok=True)
+
+    # Day directory names are the only dates parsed here; data columns are typed
+    changed_dates = pd.Series(pd.to_datetime(changed, format="%Y-%m-%d"), dtype="datetime64[ns]")
+    all_dates = pd.Series(pd.to_datetime(sorted(current), format="%Y-%m-%d"), dtype="datetime64[ns]")
+    updated = {}
+
+    for grain in ("week", "month"):
+        periods = set(period_start(changed_dates, grain))
+        days = [
+            day for day, start in zip(sorted(current), period_start(all_dates, grain))
+            if start in periods
+        ]
+        daily = read_days(days, daily_root)
+        daily["period_start"] = period_start(daily["date"], grain)
+        _replace_periods(grain, periods, merge_rows(daily, ["period_start", "category"]), root)
+        updated[grain] = len(periods)
+
+    # Years merge month rows: at most 12 per category
+    years = set(period_start(changed_dates, "year"))
+    months = read_rollup("month", root)
+    months = months[period_start(months["period_start"], "year").isin(list(years))].copy()
+    months["period_start"] = period_start(months["period_start"], "year")
+    _replace_periods("year", years, merge_rows(months, ["period_start", "category"]), root)
+    updated["year"] = len(years)
+
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    state_path.write_text(json.dumps({"days": current}))
+    return {"changed_days": len(changed), "periods_updated": updated}
@@ -0,0 +1,41 @@
+"""Deterministic hash-based samples of customers, the same in every asset"""
+from typing import Dict
+import numpy as np
+import pandas as pd
+from .sketches import hash64
+
+
+def sample_mask(keys, rate: float, seed: int = 0) -> np.ndarray:
+    """
+    True for keys in the sample
+    A key is kept when its seeded hash falls below rate x 2^64, so every
+    asset and run keeps the same keys and joins on them stay intact
+    """
+    keys = np.asarray(keys)
+    if rate >= 1:
+        return np.ones(len(keys), dtype=bool)
+    hashes = hash64(hash64(keys) ^ np.uint64(seed))
+    return hashes < np.uint64(int(rate * 2**64))
+
+
+def sample_frame(df: pd.DataFrame, rate: float, seed: int = 0, key: str = "customer_id") -> pd.DataFrame:
+    """Rows whose key is in the sample (df itself at rate 1)"""
+    if rate >= 1:
+        return df
+    return df[sample_mask(df[key].to_numpy(), rate, seed)].reset_index(drop=True)
+
+
+def estimate_total(values, rate: float) -> Dict[str, float]:
+    """
+    Population total from the values of sampled units (Horvitz-Thompson)
+    Each unit is kept independently with probability rate, so the
+    variance is (1 - rate) / rate^2 x sum(values^2); pass ones to count units
+    """
+    values = np.asarray(values, dtype=float)
+    estimate = values.sum() / rate
+    margin = 1.96 * np.sqrt((1 - rate) / rate**2 * np.square(values).sum())
+    return {
+        "estimate": round(float(estimate), 2),
+        "ci95_low": round(float(estimate - margin), 2),
+        "ci95_high": round(float(estimate + margin), 2)
+    }
@@ -1,8 +1,11 @@
 """Data validation utilities"""
-import pandas as pd
-from typing import List, Dict
+from __future__ import annotations
+from typing import TYPE_CHECKING, List, Dict
 import re
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 class DataValidator:
     """Data quality validation"""
@@ -5,14 +5,15 @@ setup(
     version="1.0.0",
     packages=find_packages(exclude=["tests"]),
     install_requires=[
-        "dagster>=1.8.0",
-        "dagster-webserver>=1.8.0",
+        "dagster>=1.10.0",
+        "dagster-webserver>=1.10.0",
         "pandas>=2.1.0",
         "requests>=2.31.0",
         "sqlalchemy>=2.0.0",
         "python-dotenv>=1.0.0",
         "faker>=20.0.0",
-        "duckdb>=0.9.0"
+        "duckdb>=0.9.0",
+        "pyarrow>=14.0.0"
     ],
     extras_require={
         "dev": [
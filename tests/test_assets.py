@@ -1,23 +1,27 @@
 """Test assets"""
 import pytest
 from dagster import materialize
-from dagster_ecommerce.assets.bronze import raw_orders, raw_customers, raw_products
+from dagster_ecommerce.assets.bronze import raw_orders, raw_customers, raw_products, raw_bronze
 from dagster_ecommerce.assets.silver import clean_orders, clean_customers
-from dagster_ecommerce.resources.api_client import PublicAPIClient
+from dagster_ecommerce.assets.gold import daily_sales_summary
+from dagster_ecommerce.resources.api_client import PublicAPIClient, MockAPIClient
+from dagster_ecommerce.resources.settings import PipelineSettings
+from dagster_ecommerce.utils.sampling import sample_mask
 import pandas as pd
 
 
 @pytest.fixture
-def public_api_client():
-    """Public API client for testing"""
-    return PublicAPIClient()
+def public_api_client(tmp_path, monkeypatch):
+    """Public API client for testing, writing under tmp_path"""
+    monkeypatch.chdir(tmp_path)
+    return PublicAPIClient(rate_limit_db=str(tmp_path / "rate_limits.sqlite"))
 
 
 def test_raw_orders_asset(public_api_client):
     """Test raw orders extraction"""
     result = materialize(
         [raw_orders],
-        resources={"api_client": public_api_client},
+        resources={"api_client": public_api_client, "settings": PipelineSettings()},
         partition_key="2024-01-01"
     )
     assert result.success
@@ -34,7 +38,7 @@ def test_raw_customers_asset(public_api_client):
     """Test customers extraction"""
     result = materialize(
         [raw_customers],
-        resources={"api_client": public_api_client}
+        resources={"api_client": public_api_client, "settings": PipelineSettings()}
     )
     assert result.success
     
@@ -48,11 +52,190 @@ def test_raw_products_asset(public_api_client):
     """Test products extraction"""
     result = materialize(
         [raw_products],
-        resources={"api_client": public_api_client}
+        resources={"api_client": public_api_client, "settings": PipelineSettings()}
     )
     assert result.success
     
     df = result.output_for_node("raw_products")
     assert isinstance(df, pd.DataFrame)
     assert len(df) > 0
-    assert "id" in df.columns
\ No newline at end of file
+    assert "id" in df.columns
+
+
+def test_raw_bronze_subsets(tmp_path, monkeypatch):
+    """The fused step materializes any subset, each asset on its own key"""
+    monkeypatch.chdir(tmp_path)
+    
+    result = materialize(
+        [raw_bronze],
+        resources={"api_client": MockAPIClient(), "settings": PipelineSettings()},
+        partition_key="2024-01-01"
+    )
+    assert result.success
+    materialized = {
+        (e.asset_key.to_user_string(), e.partition)
+        for e in (ev.event_specific_data.materialization for ev in result.get_asset_materialization_events())
+    }
+    assert materialized == {
+        ("raw_orders", "2024-01-01"), ("raw_customers", None), ("raw_products", None)
+    }
+    assert (tmp_path / "data/raw/orders/date=2024-01-01/orders.parquet").exists()
+    
+    result = materialize(
+        [raw_bronze],
+        selection=["raw_customers"],
+        resources={"api_client": MockAPIClient(), "settings": PipelineSettings()}
+    )
+    assert result.success
+    assert [e.asset_key.to_user_string() for e in result.get_asset_materialization_events()] == ["raw_customers"]
+    assert "customer_id" in result.output_for_node("raw_bronze", "raw_customers").columns
+
+
+def test_sampled_run_is_isolated(tmp_path, monkeypatch):
+    """A sampled run keeps whole customers, under its own root, with estimates"""
+    monkeypatch.chdir(tmp_path)
+    settings = PipelineSettings(sample_rate=0.2, seed=7)
+    
+    result = materialize(
+        [raw_orders, raw_products, clean_orders, daily_sales_summary],
+        resources={"api_client": MockAPIClient(), "settings": settings},
+        partition_key="2024-01-01"
+    )
+    assert result.success
+    assert not (tmp_path / "data/raw").exists()
+    assert (tmp_path / "data/samples/rate=0.2,seed=7/raw/orders/date=2024-01-01/orders.parquet").exists()
+    
+    orders = result.output_for_node("clean_orders")
+    assert 0 < len(orders) < 50  # the mock has at least 50 orders a day
+    assert sample_mask(orders["customer_id"].to_numpy(), 0.2, 7).all()
+    
+    metadata = result.asset_materializations_for_node("daily_sales_summary")[0].metadata
+    estimated = metadata["estimated_full_data"].value
+    assert estimated["num_orders"] == pytest.approx(len(orders) / 0.2)
+
+
+def test_run_config_sampling_isolates_asset_values(tmp_path, monkeypatch):
+    """Sampling set in run config also moves the run's stored asset values"""
+    from dagster import DagsterInstance
+    from dagster_ecommerce.resources import PipelineIOManager
+    
+    monkeypatch.chdir(tmp_path)
+    settings = PipelineSettings.configure_at_launch()
+    resources = {
+        "api_client": MockAPIClient(),
+        "settings": settings,
+        "io_manager": PipelineIOManager(settings=settings)
+    }
+    sampled = {"resources": {"settings": {"config": {"sample_rate": 0.2, "seed": 7}}}}
+    with DagsterInstance.ephemeral(tempdir=str(tmp_path / "home")) as instance:
+        for key, run_config in [("2024-01-01", sampled), ("2024-01-02", None)]:
+            assert materialize(
+                [raw_orders], resources=resources, partition_key=key, run_config=run_config, instance=instance
+            ).success
+    assert (tmp_path / "data/samples/rate=0.2,seed=7/storage/raw_orders/2024-01-01").exists()
+    assert not (tmp_path / "home/storage/raw_orders/2024-01-01").exists()
+    assert (tmp_path / "home/storage/raw_orders/2024-01-02").exists()
+
+
+def test_clean_customers_catches_up_on_missed_syncs(tmp_path, monkeypatch):
+    """Rows inserted by a sync clean_customers missed are still cleaned"""
+    from dagster import FilesystemIOManager
+    
+    monkeypatch.chdir(tmp_path)
+    resources = {
+        "api_client": MockAPIClient(),
+        "settings": PipelineSettings(),
+        "io_manager": FilesystemIOManager(base_dir=str(tmp_path / "storage"))
+    }
+    incremental = {"ops": {"raw_customers": {"config": {"incremental": True}}}}
+    assert materialize([raw_customers, clean_customers], resources=resources, run_config=incremental).success
+    
+    users = MockAPIClient().get_users()
+    newcomer = {**users[0], "id": 101, "customer_id": 101, "email": "newcomer@example.com"}
+    monkeypatch.setattr(MockAPIClient, "get_users", lambda self: users + [newcomer])
+    
+    # Two syncs: the second sees the newcomer as unchanged
+    for _ in range(2):
+        assert materialize([raw_customers], resources=resources, run_config=incremental).success
+    
+    result = materialize(
+        [raw_customers, clean_customers], selection=[clean_customers], resources=resources
+    )
+    assert result.success
+    df = result.output_for_node("clean_customers")
+    assert 101 in set(df["customer_id"])
+    assert df["customer_id"].is_unique
+    assert result.asset_materializations_for_node("clean_customers")[0].metadata["rows_cleaned"].value == 1
+
+
+def test_full_run_of_open_partition_stops_at_watermark(tmp_path, monkeypatch):
+    """A full run of today keeps no future orders, so micro-batches do not re-fetch them"""
+    from datetime import datetime, timezone
+    from dagster_ecommerce.partitions import open_partition_keys
+    from dagster_ecommerce.utils.microbatch import read_watermark
+    
+    monkeypatch.chdir(tmp_path)
+    key = open_partition_keys(datetime.now(timezone.utc).replace(tzinfo=None))[0]
+    resources = {"api_client": MockAPIClient(), "settings": PipelineSettings()}
+    
+    full = materialize([raw_orders], resources=resources, partition_key=key).output_for_node("raw_orders")
+    until = pd.Timestamp(read_watermark(f"data/raw/orders/date={key}")["until"])
+    assert (full["order_date"] < until).all()
+    
+    appended = materialize(
+        [raw_orders],
+        resources=resources,
+        partition_key=key,
+        run_config={"ops": {"raw_orders": {"config": {"append": True}}}}
+    ).output_for_node("raw_orders")
+    assert appended["order_id"].is_unique
+    new = appended[~appended["order_id"].isin(full["order_id"])]
+    assert (new["order_date"] >= until).all()
+
+
+class _BatchClient(MockAPIClient):
+    """Mock whose every fetch returns num_orders orders, numbered from first_order_id"""
+
+    num_orders: int = 0
+
+    def get_new_orders_table(self, since, until, first_order_id=1, category=None):
+        from datetime import datetime
+        from faker import Faker
+        from dagster_ecommerce.schemas import ORDERS_PAYLOAD_SCHEMA
+        from dagster_ecommerce.utils.columnar import parse_json_records
+        
+        fake, product = Faker(), self.get_products()[0]
+        day_start = datetime.fromisoformat(since[:10])
+        return parse_json_records(
+            [self._order(fake, first_order_id + i, product, day_start) for i in range(self.num_orders)],
+            ORDERS_PAYLOAD_SCHEMA
+        )
+
+    def get_orders_table(self, start_date, end_date):
+        return self.get_new_orders_table(start_date, end_date)
+
+
+def test_micro_batch_after_full_run_is_not_dropped(tmp_path, monkeypatch):
+    """A full run restarts order ids, so the next micro-batch must not be held to the old watermark"""
+    from datetime import datetime, timezone
+    from dagster_ecommerce.partitions import open_partition_keys
+    
+    monkeypatch.chdir(tmp_path)
+    key = open_partition_keys(datetime.now(timezone.utc).replace(tzinfo=None))[0]
+    assets = [raw_orders, raw_products, clean_orders, daily_sales_summary]
+    
+    def run(num_orders, append):
+        config = {"config": {"append": append}}
+        return materialize(
+            assets,
+            resources={"api_client": _BatchClient(num_orders=num_orders), "settings": PipelineSettings()},
+            partition_key=key,
+            run_config={"ops": {name: config for name in ["raw_orders", "clean_orders", "daily_sales_summary"]}}
+        )
+    
+    run(10, append=True)
+    run(3, append=False)
+    result = run(5, append=True)
+    assert len(result.output_for_node("raw_orders")) == 8
+    assert len(result.output_for_node("clean_orders")) == 8
+    assert result.output_for_node("daily_sales_summary")["num_orders"].sum() == 8
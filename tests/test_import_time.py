@@ -0,0 +1,56 @@
+"""Test code location load cost"""
+import json
+import subprocess
+import sys
+
+
+HEAVY_MODULES = ["pandas", "numpy", "pyarrow", "requests", "sqlalchemy", "duckdb", "faker"]
+
+# Import budget for the pipeline's own modules, on top of dagster itself
+IMPORT_BUDGET_US = 400_000
+
+LOAD_CODE_LOCATION = (
+    "import dagster; "
+    "import dagster_ecommerce; "
+    "dagster_ecommerce.defs().resolve_all_job_defs()"
+)
+
+
+def _run(args):
+    return subprocess.run(
+        [sys.executable, *args],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+
+def test_code_location_skips_heavy_imports():
+    """Building Definitions must not import data/IO libraries"""
+    result = _run([
+        "-c",
+        LOAD_CODE_LOCATION + "; import sys, json; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    ])
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
+
+
+def test_code_location_import_budget():
+    """-X importtime: everything imported after dagster stays within budget"""
+    result = _run(["-X", "importtime", "-c", LOAD_CODE_LOCATION])
+
+    total_us = 0
+    after_dagster = False
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if name.startswith("  "):
+            continue  # nested import, already counted by its parent
+        if after_dagster and cumulative.strip().isdigit():
+            total_us += int(cumulative)
+        if name.strip() == "dagster":
+            after_dagster = True
+
+    assert after_dagster
+    assert total_us < IMPORT_BUDGET_US, f"code location imports took {total_us}us"
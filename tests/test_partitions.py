@@ -0,0 +1,103 @@
+"""Test order partitioning"""
+from datetime import datetime
+import pandas as pd
+from dagster import MultiPartitionKey
+from dagster_ecommerce.partitions import (
+    ORDER_CATEGORIES,
+    OrderSlice,
+    closed_partition_keys,
+    filter_orders,
+    open_partition_keys,
+    order_slice
+)
+from dagster_ecommerce.resources.api_client import MockAPIClient
+from dagster_ecommerce.sensors.backfill_sensor import backfill_keys, backfill_progress, backfill_state, plan_steps
+
+
+def test_order_slice_decoding():
+    """Daily, hourly and date x category keys map to slices and paths"""
+    assert order_slice("2024-01-01") == OrderSlice("2024-01-01")
+    hourly = order_slice("2024-01-01-05:00")
+    assert hourly.hour == 5
+    assert hourly.path == "date=2024-01-01/hour=05"
+    multi = order_slice(MultiPartitionKey({"date": "2024-01-01", "category": "electronics"}))
+    assert multi.path == "date=2024-01-01/category=electronics"
+
+
+def test_filter_orders():
+    """Only orders inside the slice are kept"""
+    df = pd.DataFrame({
+        "order_date": pd.to_datetime(["2024-01-01T05:10:00", "2024-01-01T06:00:00", "2024-01-01T05:59:59"]),
+        "category": ["electronics", "electronics", "jewelery"]
+    })
+    assert len(filter_orders(df, OrderSlice("2024-01-01", hour=5))) == 2
+    assert len(filter_orders(df, OrderSlice("2024-01-01", hour=5, category="jewelery"))) == 1
+
+
+def test_slices_fetch_their_own_window_and_ids():
+    """Each slice of a day gets only its orders, from its own block of ids"""
+    client = MockAPIClient()
+    ids = []
+    for category in ORDER_CATEGORIES:
+        part = OrderSlice("2024-01-01", category=category)
+        orders = client.get_new_orders_table(*part.window, part.first_order_id, category).to_pandas()
+        assert len(orders) > 0
+        assert (orders["category"] == category).all()
+        ids += orders["order_id"].tolist()
+    assert len(ids) == len(set(ids))
+    
+    hours = [OrderSlice("2024-01-01", hour=hour) for hour in range(24)]
+    assert len({part.first_order_id for part in hours}) == 24
+    orders = client.get_new_orders_table(*hours[5].window, hours[5].first_order_id).to_pandas()
+    assert orders["order_date"].str.startswith("2024-01-01T05:").all()
+
+
+def test_open_and_closed_partition_keys():
+    """Micro-batches target the in-progress day, the schedule the last closed one"""
+    now = datetime(2024, 3, 2, 10, 30)
+    assert open_partition_keys(now) == ["2024-03-02"]
+    assert closed_partition_keys(now) == ["2024-03-01"]
+    assert OrderSlice("2024-03-02", hour=23).window == ("2024-03-02T23:00:00", "2024-03-03T00:00:00")
+
+
+def test_backfill_plan_pipelines_layers_newest_first():
+    """Each layer waits for the previous one; free slots go to the newest dates"""
+    keys = backfill_keys("2024-03-01", "2024-03-05")
+    assert keys == ["2024-03-05", "2024-03-04", "2024-03-03", "2024-03-02", "2024-03-01"]
+
+    limits = {"bronze": 2, "silver": 1, "gold": 1}
+    assert plan_steps(keys, {}, limits) == [("bronze", "2024-03-05"), ("bronze", "2024-03-04")]
+
+    state = {
+        ("bronze", "2024-03-05"): ("done", 1),
+        ("silver", "2024-03-05"): ("done", 1),
+        ("bronze", "2024-03-04"): ("done", 1),
+        ("bronze", "2024-03-03"): ("failed", 1),
+        ("bronze", "2024-03-02"): ("failed", 2),
+    }
+    assert plan_steps(keys, state, limits) == [
+        ("gold", "2024-03-05"),
+        ("silver", "2024-03-04"),
+        ("bronze", "2024-03-03"),
+        ("bronze", "2024-03-01"),
+    ]
+
+    state[("gold", "2024-03-05")] = ("done", 1)
+    progress = backfill_progress(keys, state, started_at=0.0, now=1800.0)
+    assert progress["completed"] == 1
+    assert progress["partitions_per_hour"] == 2.0
+    assert progress["layers"]["bronze"]["failed"] == 2
+    assert (progress["state"], progress["failed_out"]) == ("running", 1)
+
+
+def test_backfill_reaches_a_terminal_state():
+    """Complete once every key is done, failed once the rest have failed out"""
+    keys = backfill_keys("2024-03-01", "2024-03-02")
+    state = {(layer, key): ("done", 1) for layer in ("bronze", "silver", "gold") for key in keys}
+    assert backfill_state(keys, state) == "complete"
+    
+    state[("gold", "2024-03-01")] = ("failed", 1)
+    assert backfill_state(keys, state) == "running"
+    state[("gold", "2024-03-01")] = ("failed", 2)
+    assert backfill_state(keys, state) == "failed"
+    assert plan_steps(keys, state, {"bronze": 1, "silver": 1, "gold": 1}) == []
@@ -1,13 +1,26 @@
 """Test resources"""
+import contextvars
+import json
+import threading
+import time
 import pytest
+import requests
+from dagster import DagsterResourceFunctionError, build_resources
 from dagster_ecommerce.resources.api_client import PublicAPIClient
+from dagster_ecommerce.resources.settings import PipelineSettings
 from dagster_ecommerce.utils.validators import DataValidator
+from dagster_ecommerce.utils.columnar import flatten_table, parse_json_records, split_full_name, undeclared_keys
+from dagster_ecommerce.utils.contracts import SchemaDriftError
+from dagster_ecommerce.schemas import (
+    PRODUCTS_FLAT_NAMES, PRODUCTS_PAYLOAD_SCHEMA, PRODUCTS_REQUIRED_KEYS, USERS_FLAT_NAMES
+)
+from dagster_ecommerce.utils import http
 import pandas as pd
 
 
-def test_public_api_client():
+def test_public_api_client(tmp_path):
     """Test public API client"""
-    client = PublicAPIClient()
+    client = PublicAPIClient(rate_limit_db=str(tmp_path / "rate_limits.sqlite"))
     
     # Test orders
     orders = client.get_orders("2024-01-01", "2024-01-01")
@@ -41,4 +54,225 @@ def test_data_validator():
     
     # Test email validation
     assert validator.validate_email("test@example.com") == True
-    assert validator.validate_email("invalid-email") == False
\ No newline at end of file
+    assert validator.validate_email("invalid-email") == False
+
+PRODUCTS_PAYLOAD = json.dumps([
+    {"id": 1, "title": "Backpack", "price": 109.95, "category": "men's clothing",
+     "rating": {"rate": 3.9, "count": 120}},
+    {"id": 2, "title": "Ring", "price": 9.99, "category": "jewelery",
+     "rating": {"rate": 4.1, "count": 7}}
+]).encode()
+
+USERS_PAYLOAD = json.dumps([
+    {"id": 1, "name": "Leanne Graham", "email": "Sincere@april.biz",
+     "address": {"street": "Kulas Light", "city": "Gwenborough", "zipcode": "92998",
+                 "geo": {"lat": "-37.3159", "lng": "81.1496"}},
+     "company": {"name": "Romaguera-Crona"}}
+]).encode()
+
+
+def test_public_api_client_columnar(monkeypatch):
+    """Payloads parse straight into Arrow tables (offline)"""
+    payloads = {"/products": PRODUCTS_PAYLOAD, "/users": USERS_PAYLOAD}
+    monkeypatch.setattr(
+        PublicAPIClient,
+        "_make_request",
+        lambda self, url, params=None, raw=False: payloads["/" + url.rsplit("/", 1)[1]]
+    )
+    client = PublicAPIClient()
+
+    orders = client.get_orders_table("2024-01-01", "2024-01-02")
+    assert 100 <= orders.num_rows <= 200
+    assert set(orders["product_id"].to_pylist()) <= {1, 2}
+    assert orders["order_date"][0].as_py().startswith("2024-01-0")
+
+    rings = client.get_new_orders_table(
+        "2024-01-01T05:00:00", "2024-01-03T05:00:00", first_order_id=1_000_001, category="jewelery"
+    )
+    assert set(rings["product_id"].to_pylist()) <= {2}
+    assert rings["order_id"].to_pylist() == list(range(1_000_001, 1_000_001 + rings.num_rows))
+
+    products = flatten_table(client.get_products_table(), PRODUCTS_FLAT_NAMES)
+    assert products["rating_count"].to_pylist() == [120, 7]
+    assert products["stock"].null_count == 0
+
+    users = split_full_name(flatten_table(client.get_users_table(), USERS_FLAT_NAMES))
+    row = users.to_pylist()[0]
+    assert row["customer_id"] == 1
+    assert (row["city"], row["geo_lat"], row["company_name"]) == ("Gwenborough", "-37.3159", "Romaguera-Crona")
+    assert (row["first_name"], row["last_name"]) == ("Leanne", "Graham")
+
+
+def test_parse_json_records_drops_undeclared_keys():
+    """Pretty-printed arrays parse; a new key, even nested, is dropped and reported"""
+    table = parse_json_records(json.dumps(json.loads(PRODUCTS_PAYLOAD), indent=2), PRODUCTS_PAYLOAD_SCHEMA)
+    assert table.schema == PRODUCTS_PAYLOAD_SCHEMA
+    assert table["title"].to_pylist() == ["Backpack", "Ring"]
+    assert undeclared_keys(table) == []
+    
+    drifted = PRODUCTS_PAYLOAD.replace(b'"count": 7}', b'"count": 7, "votes": 3}')
+    table = parse_json_records(drifted, PRODUCTS_PAYLOAD_SCHEMA, PRODUCTS_REQUIRED_KEYS)
+    assert table.schema.equals(PRODUCTS_PAYLOAD_SCHEMA)
+    assert table["rating"].to_pylist()[1] == {"rate": 4.1, "count": 7}
+    assert undeclared_keys(table) == ["rating.votes"]
+    table = parse_json_records([{"id": 1, "color": "red"}], PRODUCTS_PAYLOAD_SCHEMA)
+    assert "color" not in table.column_names
+    assert undeclared_keys(table) == ["color"]
+
+
+def test_parse_json_records_rejects_type_changes_and_missing_keys():
+    """Only a required key gone from every record, or a value of another type, is drift"""
+    retyped = PRODUCTS_PAYLOAD.replace(b'"price": 9.99', b'"price": "9.99"')
+    with pytest.raises(SchemaDriftError, match="price"):
+        parse_json_records(retyped, PRODUCTS_PAYLOAD_SCHEMA)
+    with pytest.raises(SchemaDriftError):
+        parse_json_records([{"id": "one"}], PRODUCTS_PAYLOAD_SCHEMA)
+    
+    renamed = PRODUCTS_PAYLOAD.replace(b'"title"', b'"name"')
+    with pytest.raises(SchemaDriftError, match="title"):
+        parse_json_records(renamed, PRODUCTS_PAYLOAD_SCHEMA, PRODUCTS_REQUIRED_KEYS)
+    # Declared but not required (filled in by the client): nulls
+    assert parse_json_records(PRODUCTS_PAYLOAD, PRODUCTS_PAYLOAD_SCHEMA, PRODUCTS_REQUIRED_KEYS)["stock"].null_count == 2
+
+
+def _response(status, body=b"{}", headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    response.headers.update(headers or {})
+    return response
+
+
+def test_hedged_get_hedges_slow_and_retries_after(monkeypatch):
+    """A slow primary is hedged; 503 + Retry-After is retried, not slept on"""
+    monkeypatch.setattr(http, "DEFAULT_HEDGE_DELAY", 0.05)
+    calls = []
+    lock = threading.Lock()
+
+    def slow_then_fast(url, params=None, timeout=None):
+        with lock:
+            calls.append(url)
+            first = len(calls) == 1
+        if first:
+            time.sleep(1.0)
+        return _response(200, b'{"ok": true}')
+
+    started = time.perf_counter()
+    response = http.hedged_get("http://test/hedge", get=slow_then_fast)
+    assert response.json() == {"ok": True}
+    assert time.perf_counter() - started < 0.5
+    assert http.endpoint_stats()["http://test/hedge"]["hedge_wins"] == 1
+
+    statuses = iter([_response(503, headers={"Retry-After": "0"}), _response(200)])
+    response = http.hedged_get(
+        "http://test/retry", hedge=False, get=lambda url, params=None, timeout=None: next(statuses)
+    )
+    assert response.status_code == 200
+    assert http.endpoint_stats()["http://test/retry"]["retries"] == 1
+
+
+def test_hedged_get_circuit_breaker():
+    """Consecutive failures open the circuit; further calls fail fast"""
+    def down(url, params=None, timeout=None):
+        raise requests.exceptions.ConnectionError("down")
+
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            http.hedged_get(
+                "http://test/down", hedge=False, max_retries=2, backoff_base=0.001,
+                failure_threshold=3, get=down
+            )
+    with pytest.raises(http.CircuitOpenError):
+        http.hedged_get("http://test/down", hedge=False, get=down)
+    assert http.endpoint_stats()["http://test/down"]["circuit"] == "open"
+
+
+class _Limiter:
+    """Stands in for SharedTokenBucket: acquire() waits (or fails), counted"""
+
+    def __init__(self, wait=0.0, error=None):
+        self.wait, self.error, self.acquired = wait, error, 0
+
+    def acquire(self, timeout=None):
+        self.acquired += 1
+        if self.error is not None:
+            raise self.error
+        time.sleep(self.wait)
+        return self.wait
+
+    def feedback(self, status_code, latency, retry_after=None):
+        return 1.0
+
+    def state(self):
+        return {"rate": 1.0, "tokens": 0.0}
+
+
+def test_hedge_waits_for_the_primary_token(monkeypatch):
+    """A primary still waiting on the rate limiter is not hedged"""
+    monkeypatch.setattr(http, "DEFAULT_HEDGE_DELAY", 0.05)
+    limiter = _Limiter(wait=0.3)
+    response = http.hedged_get(
+        "http://test/limited", limiter=limiter, get=lambda url, params=None, timeout=None: _response(200)
+    )
+    assert response.status_code == 200
+    assert limiter.acquired == 1
+    assert http.endpoint_stats()["http://test/limited"]["hedges"] == 0
+
+
+def test_rate_limit_wait_does_not_wedge_half_open_circuit():
+    """A probe that never got its token leaves the half-open circuit free to probe again"""
+    from dagster_ecommerce.utils.ratelimit import RateLimitWaitExceeded
+    
+    def down(url, params=None, timeout=None):
+        raise requests.exceptions.ConnectionError("down")
+
+    options = {"hedge": False, "max_retries": 1, "failure_threshold": 1, "reset_seconds": 0}
+    with pytest.raises(requests.exceptions.ConnectionError):
+        http.hedged_get("http://test/probe", get=down, **options)
+    with pytest.raises(RateLimitWaitExceeded):
+        http.hedged_get(
+            "http://test/probe", get=down, limiter=_Limiter(error=RateLimitWaitExceeded("busy")), **options
+        )
+    response = http.hedged_get(
+        "http://test/probe", get=lambda url, params=None, timeout=None: _response(200), **options
+    )
+    assert response.status_code == 200
+
+
+def test_shared_responses_fetch_once():
+    """Concurrent identical GETs inside shared_responses() hit the API once"""
+    calls = []
+
+    def slow(url, params=None, timeout=None):
+        calls.append(url)
+        time.sleep(0.05)
+        return _response(200, b"[]")
+
+    results = []
+    with http.shared_responses():
+        threads = [
+            threading.Thread(target=contextvars.copy_context().run, args=(lambda: results.append(
+                http.hedged_get("http://test/catalog", hedge=False, get=slow)
+            ),))
+            for _ in range(3)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # Another context (e.g. another run in the process) has its own
+        contextvars.Context().run(http.hedged_get, "http://test/catalog", hedge=False, get=slow)
+    assert len(calls) == 2 and len(results) == 3
+
+    http.hedged_get("http://test/catalog", hedge=False, get=slow)
+    assert len(calls) == 3
+
+
+def test_settings_reject_sample_rate_outside_unit_interval():
+    """sample_rate must be in (0, 1]; anything else fails at resource setup"""
+    for rate in (0.0, -0.5, 1.5):
+        with pytest.raises(DagsterResourceFunctionError):
+            with build_resources({"settings": PipelineSettings(sample_rate=rate)}):
+                pass
+    with build_resources({"settings": PipelineSettings(sample_rate=1.0)}) as resources:
+        assert resources.settings.root == "data"
@@ -0,0 +1,378 @@
+"""Test utilities"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+from dagster_ecommerce.utils.parallel import run_chunked
+from dagster_ecommerce.utils.sketches import HyperLogLog, score_by_boundaries
+from dagster_ecommerce.utils.customer_index import CustomerIndex, write_customer_index
+from dagster_ecommerce.utils.compaction import compact_range, prune_files, read_compacted, read_dataset
+from dagster_ecommerce.utils.cdc import SnapshotStore
+from dagster_ecommerce.utils.contracts import SchemaDriftError, conform, contract, to_frame, write_contract
+from dagster_ecommerce.utils.microbatch import append_part, read_partition, read_watermark, write_watermark
+from dagster_ecommerce.assets.gold.daily_sales import order_aggregates, combine_aggregates, summarize
+from dagster_ecommerce.utils.dimensions import _CACHE, product_dimension
+from dagster_ecommerce.utils import ratelimit
+from dagster_ecommerce.utils.ratelimit import RateLimitWaitExceeded, SharedTokenBucket
+from dagster_ecommerce.utils.rollups import daily_sidecar, read_rollup, update_rollups
+from dagster_ecommerce.utils.sampling import estimate_total, sample_mask
+from dagster_ecommerce.assets.silver.clean_orders import clean_orders_chunk
+
+
+def _orders(n):
+    return pd.DataFrame({
+        "order_id": range(n),
+        "customer_id": [i % 7 for i in range(n)],
+        "product_id": [i % 5 for i in range(n)],
+        "quantity": [i % 4 for i in range(n)],
+        "total_amount": [float(i % 9) for i in range(n)],
+        "order_date": pd.Timestamp("2024-01-01")  # typed since bronze
+    })
+
+
+def test_run_chunked_matches_serial():
+    """Chunked process-pool run gives the same rows, in order"""
+    df = _orders(1000)
+    serial = clean_orders_chunk(df).reset_index(drop=True)
+    chunked = run_chunked(df, clean_orders_chunk, num_workers=2, chunk_size=128)
+    pd.testing.assert_frame_equal(serial, chunked)
+
+
+def _fail_first_chunk(df):
+    if df['order_id'].min() == 0:
+        raise ValueError("bad chunk")
+    return df
+
+
+def test_run_chunked_releases_blocks_on_error():
+    """Blocks of the chunks that succeeded are unlinked when another fails"""
+    from pathlib import Path
+    
+    before = set(Path("/dev/shm").glob("psm_*"))
+    with pytest.raises(ValueError, match="bad chunk"):
+        run_chunked(_orders(1000), _fail_first_chunk, num_workers=2, chunk_size=128)
+    assert set(Path("/dev/shm").glob("psm_*")) <= before
+
+
+def test_score_by_boundaries_matches_qcut():
+    """Boundary lookup reproduces pd.qcut bins"""
+    values = pd.Series(np.arange(1, 101, dtype=float))
+    bounds = values.quantile([0.2, 0.4, 0.6, 0.8]).values
+    expected = pd.qcut(values, q=5, labels=[1, 2, 3, 4, 5]).astype(int)
+    assert list(score_by_boundaries(values, bounds)) == list(expected)
+    assert list(score_by_boundaries(values, bounds, descending=True)) == list(6 - expected)
+
+
+def test_customer_index_lookup(tmp_path):
+    """Index round-trips CLV rows and misses unknown ids"""
+    df = pd.DataFrame({
+        "customer_id": [30, 10, 20],
+        "lifetime_value": [300.0, 100.0, 200.0],
+        "recency_score": [5, 1, 3],
+        "frequency_score": [5, 1, 3],
+        "monetary_score": [5, 1, 3],
+        "rfm_score": [15, 3, 9],
+        "rfm_segment": ["Champions", "At Risk", "Potential"]
+    })
+    path = str(tmp_path / "clv_index.npy")
+    assert write_customer_index(df, path) == 3
+    assert os.stat(path).st_mode & 0o777 == 0o644
+
+    index = CustomerIndex(path)
+    assert index.get(20)["lifetime_value"] == 200.0
+    assert index.get(30)["rfm_segment"] == "Champions"
+    assert index.get(25) is None
+
+
+def test_compaction_manifest_pruning(tmp_path, monkeypatch):
+    """Daily files compact into one sorted file that readers find via the manifest"""
+    monkeypatch.chdir(tmp_path)
+    for day in range(1, 4):
+        out = tmp_path / f"data/raw/orders/date=2024-01-0{day}"
+        out.mkdir(parents=True)
+        pd.DataFrame({
+            "order_id": [day * 10, day * 10 + 1],
+            "customer_id": [day + 5, day],
+            "product_id": [1, 2]
+        }).to_parquet(out / "orders.parquet", index=False)
+
+    entry = compact_range("raw_orders", "2024-01-01", "2024-01-31", "month=2024-01")
+    assert entry["num_rows"] == 6
+    assert entry["num_source_files"] == 3
+    assert entry["stats"]["customer_id"] == [1, 8]
+
+    df = read_compacted("raw_orders", start_date="2024-01-01")
+    assert list(df["customer_id"]) == sorted(df["customer_id"])
+    assert prune_files("raw_orders", equals={"customer_id": 99}) == []
+    assert prune_files("raw_orders", start_date="2024-02-01") == []
+    assert list(read_compacted("raw_orders", equals={"customer_id": 2})["order_id"]) == [21]
+
+
+def test_read_dataset_prefers_current_compacted_files(tmp_path):
+    """Compacted months replace their days, unless a day was rewritten since"""
+    def write_day(day, order_ids):
+        write_contract(pd.DataFrame({
+            "order_id": order_ids,
+            "customer_id": 1,
+            "product_id": 1,
+            "product_name": "Ring",
+            "category": "jewelery",
+            "quantity": 1,
+            "unit_price": 5.0,
+            "total_amount": 5.0,
+            "order_date": pd.Timestamp(day),
+            "status": "completed"
+        }), "raw_orders", tmp_path / f"raw/orders/date={day}/orders.parquet")
+    
+    root = str(tmp_path / "compacted")
+    read = lambda: sorted(read_dataset(
+        "raw_orders", "raw_orders", columns=["order_id", "order_date"], root=root, data_root=str(tmp_path)
+    )["order_id"])
+    write_day("2024-01-01", [1, 2])
+    write_day("2024-01-02", [3])
+    compact_range("raw_orders", "2024-01-01", "2024-01-31", "month=2024-01", root=root, data_root=str(tmp_path))
+    write_day("2024-02-01", [4])
+    assert read() == [1, 2, 3, 4]
+    
+    # Delete the days: January now only exists compacted
+    for day in ("2024-01-01", "2024-01-02"):
+        (tmp_path / f"raw/orders/date={day}/orders.parquet").unlink()
+    assert read() == [1, 2, 3, 4]
+    
+    # A re-materialized day is newer than the compacted month
+    time.sleep(0.01)
+    write_day("2024-01-02", [5])
+    assert read() == [1, 2, 4, 5]
+
+
+def _products(ids, titles):
+    """Typed raw_products rows"""
+    n = len(ids)
+    return to_frame(conform(pd.DataFrame({
+        "id": ids, "title": titles, "price": [9.5] * n, "description": ["-"] * n,
+        "category": ["jewelery"] * n, "image": ["-"] * n, "rating_rate": [4.0] * n,
+        "rating_count": [10] * n, "stock": [5] * n, "supplier": ["acme"] * n
+    }), "raw_products"))
+
+
+def test_snapshot_store_hash_diff(tmp_path):
+    """Only changed rows land in a delta; snapshot + deltas replay the latest state"""
+    store = SnapshotStore(str(tmp_path), "id", "items.parquet", asset="raw_products")
+    first = _products([1, 2, 3], ["a", "b", "c"])
+    _, counts = store.sync(first)
+    assert counts["inserted"] == 3 and counts["consolidated"]
+
+    second = _products([1, 2, 4], ["a", "B", "d"])
+    annotated, counts = store.sync(second)
+    assert list(annotated["_change"]) == ["unchanged", "update", "insert"]
+    assert (counts["updated"], counts["inserted"], counts["deleted"]) == (1, 1, 1)
+    assert not counts["consolidated"]
+    delta = pq.read_table(tmp_path / "deltas/version=000002/delta.parquet")
+    assert delta.schema.equals(contract("raw_products_delta"))
+    pd.testing.assert_frame_equal(store.read(), second)
+
+    _, counts = store.sync(second)
+    assert counts["version"] == 2
+
+
+def test_microbatch_parts_and_watermark(tmp_path):
+    """Parts append after the base file; the watermark merges updates"""
+    orders = _orders(6).assign(
+        product_name="a", category="jewelery", unit_price=1.0, status="completed"
+    )
+    write_contract(orders.iloc[1:3], "raw_orders", tmp_path / "orders.parquet")
+    append_part(orders.iloc[3:4], str(tmp_path), asset="raw_orders")
+    append_part(orders.iloc[4:6], str(tmp_path), asset="raw_orders")
+    write_watermark(str(tmp_path), until="2024-01-01T10:00:00")
+    write_watermark(str(tmp_path), next_order_id=6)
+
+    assert list(read_partition(str(tmp_path), asset="raw_orders")["order_id"]) == [1, 2, 3, 4, 5]
+    assert read_watermark(str(tmp_path)) == {"until": "2024-01-01T10:00:00", "next_order_id": 6}
+
+
+def test_incremental_daily_sales_matches_full():
+    """Folding a micro-batch into stored aggregates gives the full-day summary"""
+    orders = pd.DataFrame({
+        "order_id": range(1, 7),
+        "customer_id": [1, 2, 1, 3, 2, 1],
+        "category": ["a", "a", "b", "a", "b", "a"],
+        "total_amount": [10.0, 20.0, 5.0, 7.5, 2.5, 1.0],
+        "quantity": [1, 2, 1, 3, 1, 1],
+        "order_date": pd.date_range("2024-01-01 08:00", periods=6, freq="h")
+    })
+    full = summarize(*order_aggregates(orders))
+    incremental = summarize(*combine_aggregates(
+        order_aggregates(orders.iloc[:4]), order_aggregates(orders.iloc[4:])
+    ))
+
+    pd.testing.assert_frame_equal(incremental, full)
+    assert list(full["unique_customers"]) == [3, 2]
+
+
+def test_hyperloglog_merge():
+    """Merged sketches count the union, within HLL error"""
+    a = HyperLogLog().update(np.arange(0, 60_000))
+    b = HyperLogLog().update(np.arange(40_000, 100_000))
+    assert abs(HyperLogLog.from_bytes(a.to_bytes()).merge(b).count() - 100_000) < 5_000
+    assert HyperLogLog().update([1, 2, 3, 3]).count() == 3
+
+
+def test_rollups_update_only_changed_periods(tmp_path):
+    """Re-materializing one day touches only its week, month and year"""
+    daily_root, root = str(tmp_path / "daily"), str(tmp_path / "rollups")
+
+    def write_day(day, customers):
+        orders = pd.DataFrame({
+            "order_id": range(len(customers)),
+            "customer_id": customers,
+            "category": "a",
+            "total_amount": 10.0,
+            "quantity": 1,
+            "order_date": pd.Timestamp(day)
+        })
+        out = tmp_path / "daily" / f"date={day}"
+        out.mkdir(parents=True, exist_ok=True)
+        daily_sidecar(*order_aggregates(orders)).to_parquet(out / "_rollup.parquet", index=False)
+
+    write_day("2024-01-30", [1, 2])
+    write_day("2024-02-01", [2, 3])
+    write_day("2024-03-15", [4])
+    result = update_rollups(daily_root, root)
+    assert result["changed_days"] == 3
+
+    months = read_rollup("month", root)
+    assert list(months["num_orders"]) == [2, 2, 1]
+    year = read_rollup("year", root).iloc[0]
+    assert (year["num_orders"], year["unique_customers"]) == (5, 4)
+
+    write_day("2024-03-15", [4, 5, 1])
+    result = update_rollups(daily_root, root)
+    assert result == {"changed_days": 1, "periods_updated": {"week": 1, "month": 1, "year": 1}}
+    assert read_rollup("year", root).iloc[0]["unique_customers"] == 5
+    assert list(read_rollup("week", root)["num_orders"]) == [4, 3]
+
+
+def test_product_dimension_lookup_and_cache(tmp_path):
+    """Array lookups flag unknown ids; one build per catalog version"""
+    products = pd.DataFrame({
+        "id": [3, 1, 2],
+        "title": ["c", "a", "b"],
+        "category": ["x", "y", "x"]
+    })
+    dimension = product_dimension(products, root=str(tmp_path))
+    categories, known = dimension.lookup("category", [1, 3, 7, -1])
+    assert list(categories) == ["y", "x", None, None]
+    assert list(known) == [True, True, False, False]
+
+    # Same catalog in another order: same version, from cache or disk
+    assert product_dimension(products.iloc[::-1], root=str(tmp_path)) is dimension
+    _CACHE.clear()
+    reloaded = product_dimension(products, root=str(tmp_path))
+    assert reloaded.version == dimension.version
+    assert list(reloaded.lookup("title", [2])[0]) == ["b"]
+
+
+def _take_tokens(db_path, n):
+    bucket = SharedTokenBucket("api", rate=20.0, burst=1.0, db_path=db_path)
+    for _ in range(n):
+        bucket.acquire(timeout=10)
+    return n
+
+
+def test_shared_token_bucket_across_processes(tmp_path):
+    """Four processes share one 20 req/s budget"""
+    db_path = str(tmp_path / "limits.sqlite")
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        assert sum(pool.map(_take_tokens, [db_path] * 4, [5] * 4)) == 20
+    # 1 burst token, then 19 more at 20/s
+    assert time.perf_counter() - started >= 0.9
+
+
+def test_shared_token_bucket_aimd(tmp_path):
+    """429 halves the rate once per cooldown; successes raise it slowly"""
+    bucket = SharedTokenBucket("api", rate=10.0, db_path=str(tmp_path / "limits.sqlite"))
+    assert bucket.feedback(429, 0.1) == 5.0
+    assert bucket.feedback(429, 0.1) == 5.0
+    assert 5.0 < bucket.feedback(200, 0.1) < 5.2
+    assert bucket.state()["rate"] > 5.0
+
+
+class _FakeClock:
+    """time.time/monotonic/sleep, where sleeping only advances the clock"""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+        self.slept = 0.0
+
+    def time(self):
+        return self.now
+
+    monotonic = time
+
+    def sleep(self, seconds):
+        # A real clock always moves on, however short the sleep
+        seconds = max(seconds, 1e-3)
+        self.now += seconds
+        self.slept += seconds
+
+
+def test_shared_token_bucket_waits_out_retry_after(tmp_path, monkeypatch):
+    """A long Retry-After is slept through; only a wait past the budget fails, retryably"""
+    import requests
+    
+    clock = _FakeClock()
+    monkeypatch.setattr(ratelimit, "time", clock)
+    bucket = SharedTokenBucket("api", rate=10.0, db_path=str(tmp_path / "limits.sqlite"))
+    
+    bucket.acquire()
+    bucket.feedback(429, 0.1, retry_after=45)
+    assert 45 <= bucket.acquire(timeout=60) < 46
+    assert clock.slept >= 45
+    
+    bucket.feedback(429, 0.1, retry_after=120)
+    with pytest.raises(requests.exceptions.RequestException) as error:
+        bucket.acquire(timeout=60)
+    assert isinstance(error.value, RateLimitWaitExceeded)
+
+
+def test_contract_parses_once_and_catches_drift(tmp_path):
+    """Bronze strings become timestamps/categoricals; parts read back typed"""
+    raw = pd.DataFrame({
+        "order_id": [1, 2], "customer_id": [7, 8], "product_id": [3, 3],
+        "product_name": ["a", "a"], "category": ["jewelery", "electronics"],
+        "quantity": [1, 2], "unit_price": [2.5, 2.5], "total_amount": [2.5, 5.0],
+        "order_date": ["2024-01-01T05:00:00", "2024-01-01T06:30:00"],
+        "status": ["completed", "pending"]
+    })
+    df = to_frame(conform(raw, "raw_orders"))
+    assert df["order_date"].dtype.kind == "M"
+    assert isinstance(df["category"].dtype, pd.CategoricalDtype)
+
+    append_part(df.iloc[:1], str(tmp_path), asset="raw_orders")
+    append_part(df.iloc[1:], str(tmp_path), asset="raw_orders")
+    parts = read_partition(str(tmp_path), asset="raw_orders")
+    assert list(parts["category"].cat.categories) == ["jewelery", "electronics"]
+    assert parts["order_date"].dt.hour.tolist() == [5, 6]
+
+    with pytest.raises(SchemaDriftError, match="order_date"):
+        conform(raw.assign(order_date="yesterday"), "raw_orders")
+    with pytest.raises(SchemaDriftError, match="undeclared columns \\['coupon'\\]"):
+        conform(raw.assign(coupon="X"), "raw_orders")
+
+
+def test_sample_mask_is_deterministic_and_unbiased():
+    """Same keys for every call, about rate of them, estimates cover the truth"""
+    ids = np.arange(1, 100_001)
+    mask = sample_mask(ids, 0.05, seed=3)
+    assert np.array_equal(mask, sample_mask(ids[::-1], 0.05, seed=3)[::-1])
+    assert abs(mask.mean() - 0.05) < 0.005
+    assert not np.array_equal(mask, sample_mask(ids, 0.05, seed=4))
+    assert sample_mask(ids, 1.0).all()
+    
+    values = (ids % 50).astype(float)
+    estimate = estimate_total(values[mask], 0.05)
+    assert estimate["ci95_low"] <= values.sum() <= estimate["ci95_high"]